@@ -0,0 +1,177 @@
+import sys
+import time
+import asyncio
+import aiohttp
+import argparse
+import statistics
+import subprocess
+import uvicorn
+from fastapi import FastAPI, WebSocket, WebSocketDisconnect
+from wheel_of_fortune._config import Config
+from wheel_of_fortune._logging import setup_logging
+from wheel_of_fortune._server import server_options
+from wheel_of_fortune.schemas import (
+    EncoderState,
+    SectorState,
+    WheelStateUpdate,
+    WsUpdatePacket,
+)
+
+
+def make_update(i):
+    # Encoder update as broadcast while the wheel is spinning, with sectors
+    return WheelStateUpdate(
+        encoder=EncoderState(
+            sector=i % 16,
+            rpm=30.0,
+            total_revs=i / 16,
+            total_sectors=i,
+            missed_sector_count=0,
+            standstill=False,
+        ),
+        sectors=[
+            SectorState(index=j, name="Sector %d" % (j), effect_id="default")
+            for j in range(16)
+        ],
+    )
+
+
+def make_app():
+    app = FastAPI()
+    clients: set[WebSocket] = set()
+
+    @app.get("/api/v1/bench/state")
+    async def get_state() -> WheelStateUpdate:
+        return make_update(0)
+
+    @app.websocket("/api/v1/bench/ws")
+    async def websocket_endpoint(websocket: WebSocket):
+        await websocket.accept()
+        clients.add(websocket)
+        try:
+            while True:
+                await websocket.receive_text()
+        except WebSocketDisconnect:
+            clients.discard(websocket)
+
+    @app.post("/api/v1/bench/broadcast")
+    async def broadcast(count: int):
+        # Same as WsManager: serialize once, send to all clients concurrently
+        for i in range(count):
+            packet = WsUpdatePacket(ts=time.time(), update=make_update(i))
+            data = packet.model_dump_json(exclude_none=True)
+            await asyncio.gather(*(ws.send_text(data) for ws in clients))
+
+    return app
+
+
+def serve(profile, port):
+    config = Config(server_profile=profile, server_port=port, log_level="warning")
+    setup_logging(config)
+    options = server_options(config)
+    options["host"] = "127.0.0.1"
+    uvicorn.run(make_app(), **options)
+
+
+def print_stats(name, latencies, elapsed):
+    latencies_ms = sorted(1e3 * t for t in latencies)
+    print(
+        "  %s: %.0f/s, median %.2f ms, p95 %.2f ms, max %.2f ms"
+        % (
+            name,
+            len(latencies_ms) / elapsed,
+            statistics.median(latencies_ms),
+            latencies_ms[int(0.95 * (len(latencies_ms) - 1))],
+            latencies_ms[-1],
+        )
+    )
+
+
+async def wait_for_server(session):
+    for _ in range(100):
+        try:
+            async with session.get("/api/v1/bench/state") as resp:
+                await resp.read()
+                return
+        except aiohttp.ClientError:
+            await asyncio.sleep(0.1)
+    raise TimeoutError("server did not start")
+
+
+async def benchmark_requests(session, count, concurrency):
+    latencies = []
+
+    async def worker(n):
+        for _ in range(n):
+            start = time.perf_counter()
+            async with session.get("/api/v1/bench/state") as resp:
+                await resp.read()
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker(count // concurrency) for _ in range(concurrency)))
+    print_stats("requests", latencies, time.perf_counter() - start)
+
+
+async def benchmark_broadcast(session, count, num_clients):
+    latencies = []
+
+    async def client(ws):
+        for _ in range(count):
+            msg = await ws.receive()
+            latencies.append(time.time() - float(msg.json()["ts"]))
+
+    websockets = [
+        await session.ws_connect("/api/v1/bench/ws") for _ in range(num_clients)
+    ]
+    start = time.perf_counter()
+    receivers = asyncio.gather(*(client(ws) for ws in websockets))
+    async with session.post("/api/v1/bench/broadcast", params={"count": count}):
+        pass
+    await receivers
+    print_stats("ws messages", latencies, time.perf_counter() - start)
+    for ws in websockets:
+        await ws.close()
+
+
+async def benchmark(profile, args):
+    print("%s:" % (profile))
+    server = subprocess.Popen(
+        [sys.executable, __file__, "--serve", profile, "--port", str(args.port)]
+    )
+    try:
+        connector = aiohttp.TCPConnector(limit=args.concurrency)
+        async with aiohttp.ClientSession(
+            base_url="http://127.0.0.1:%d" % (args.port), connector=connector
+        ) as session:
+            await wait_for_server(session)
+            await benchmark_requests(session, args.count, args.concurrency)
+            await benchmark_broadcast(session, args.count, args.clients)
+    finally:
+        server.terminate()
+        server.wait()
+
+
+async def main(args):
+    for profile in args.profiles:
+        await benchmark(profile, args)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        prog="Server benchmark",
+        description="Compares request and WS broadcast throughput of server profiles",
+    )
+    parser.add_argument(
+        "--profiles", type=str, nargs="+", default=["development", "production"]
+    )
+    parser.add_argument("--port", type=int, default=8123)
+    parser.add_argument("--count", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--clients", type=int, default=4)
+    parser.add_argument("--serve", type=str, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.serve is not None:
+        serve(args.serve, args.port)
+    else:
+        asyncio.run(main(args))
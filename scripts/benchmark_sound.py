@@ -0,0 +1,120 @@
+import os
+
+# Offline test, no sound card needed (must be set before pygame is imported)
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import json  # noqa: E402
+import asyncio  # noqa: E402
+import argparse  # noqa: E402
+import tempfile  # noqa: E402
+import statistics  # noqa: E402
+from wheel_of_fortune._config import Config  # noqa: E402
+from wheel_of_fortune._settings import SettingsManager  # noqa: E402
+from wheel_of_fortune._telemetry import Telemetry  # noqa: E402
+from wheel_of_fortune._soundsystem import SoundSystem, MAIN_CH, EFFECT_CH  # noqa: E402
+
+
+def print_stats(name, latencies):
+    latencies_ms = sorted(1e3 * t for t in latencies)
+    print(
+        "%s: n=%d, mean %.1f ms, median %.1f ms, p95 %.1f ms, max %.1f ms"
+        % (
+            name,
+            len(latencies_ms),
+            statistics.mean(latencies_ms),
+            statistics.median(latencies_ms),
+            latencies_ms[int(0.95 * (len(latencies_ms) - 1))],
+            latencies_ms[-1],
+        )
+    )
+
+
+async def cpu_load(duty):
+    # Simulates WS broadcasts (JSON encoding) hogging the event loop
+    payload = {"sectors": [{"name": "sector %d" % i, "pos": i} for i in range(2000)]}
+    period = 0.05
+    loop = asyncio.get_running_loop()
+    while True:
+        end = loop.time() + duty * period
+        while loop.time() < end:
+            json.dumps(payload)
+        await asyncio.sleep((1.0 - duty) * period)
+
+
+async def main(args):
+    config = Config(
+        data_dir=args.data_dir,
+        sound_mixer_buffer=args.buffer,
+        sound_voices=args.voices,
+    )
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        settings_mgr = SettingsManager(os.path.join(tmp_dir, "settings.json"))
+        await settings_mgr.open()
+        soundsystem = SoundSystem(
+            config, settings_mgr["sound"], Telemetry(config), lambda state: None
+        )
+        await soundsystem.open()
+        sounds = soundsystem.get_info().sounds
+        if len(sounds) == 0:
+            raise ValueError("No sounds found in: %s" % (args.data_dir))
+        effect_names = sorted(sounds.keys())
+        print("Sounds: %d, buffer: %d samples" % (len(sounds), args.buffer))
+
+        # Music stream is needed to detect mixer stalls
+        music_name = max(sounds.keys(), key=lambda n: sounds[n].duration_secs)
+        await soundsystem.play(MAIN_CH, music_name, fade_ms=0)
+
+        tasks = [asyncio.create_task(soundsystem.maintain())]
+        if args.load > 0.0:
+            tasks.append(asyncio.create_task(cpu_load(args.load)))
+
+        loop = asyncio.get_running_loop()
+        jitter, latency = [], []
+        start_time = loop.time() + 0.5
+        for i in range(args.count):
+            scheduled = start_time + i * args.interval
+            await asyncio.sleep(max(0.0, scheduled - loop.time()))
+            wakeup = loop.time()
+            await soundsystem.play(
+                EFFECT_CH, effect_names[i % len(effect_names)], fade_ms=0
+            )
+            latency.append(loop.time() - wakeup)
+            jitter.append(loop.time() - scheduled)
+
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        soundsystem.report_stats()
+        stats = soundsystem.get_state().stats
+        await soundsystem.close()
+
+    print_stats("play latency", latency)
+    print_stats("schedule jitter", jitter)
+    print(
+        "Mixer: output latency %.1f ms, stalls %d (max %.1f ms), "
+        "busy voices avg %.2f, max %d"
+        % (
+            stats.output_latency_ms,
+            stats.stalls,
+            stats.stall_max_ms,
+            stats.busy_voices_avg or 0.0,
+            stats.busy_voices_max,
+        )
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        prog="Sound benchmark",
+        description="Measures sound scheduling jitter and mixer stalls offline "
+        "(dummy audio driver)",
+    )
+    parser.add_argument("--data-dir", type=str, default="./data")
+    parser.add_argument("--count", type=int, default=100)
+    parser.add_argument("--interval", type=float, default=0.1)
+    parser.add_argument("--buffer", type=int, default=512)
+    parser.add_argument("--voices", type=int, default=8)
+    parser.add_argument(
+        "--load", type=float, default=0.0, help="Event loop busy fraction (0..1)"
+    )
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,71 @@
+import json
+import time
+import asyncio
+import aiohttp
+import argparse
+import statistics
+
+
+def print_stats(name, latencies):
+    latencies_ms = sorted(1e3 * t for t in latencies)
+    print(
+        "%s: n=%d, mean %.1f ms, median %.1f ms, p95 %.1f ms, max %.1f ms"
+        % (
+            name,
+            len(latencies_ms),
+            statistics.mean(latencies_ms),
+            statistics.median(latencies_ms),
+            latencies_ms[int(0.95 * (len(latencies_ms) - 1))],
+            latencies_ms[-1],
+        )
+    )
+
+
+def make_update(i):
+    # Alternate brightness, small enough to fit into a single WS frame
+    return {"on": True, "bri": 100 + i % 2}
+
+
+async def benchmark_http(session, count):
+    res = []
+    for i in range(count):
+        start = time.perf_counter()
+        async with session.post("/json/state", json=make_update(i)) as resp:
+            await resp.read()
+        res.append(time.perf_counter() - start)
+    return res
+
+
+async def benchmark_ws(session, count):
+    res = []
+    async with session.ws_connect("/ws") as ws:
+        await ws.receive()  # initial full state
+        for i in range(count):
+            start = time.perf_counter()
+            await ws.send_str(json.dumps(make_update(i)))
+            # WLED answers every state message (success or full state)
+            await ws.receive()
+            res.append(time.perf_counter() - start)
+    return res
+
+
+async def main(args):
+    connector = aiohttp.TCPConnector(limit=2)
+    async with aiohttp.ClientSession(base_url=args.url, connector=connector) as session:
+        # Warm up connection
+        async with session.get("/json/info") as resp:
+            info = await resp.json()
+        print("WLED version: %s" % (info.get("ver")))
+
+        print_stats("http", await benchmark_http(session, args.count))
+        print_stats("ws", await benchmark_ws(session, args.count))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        prog="WLED benchmark",
+        description="Compares per update latency of WLED HTTP and WebSocket APIs",
+    )
+    parser.add_argument("--url", type=str, default="http://wled.local")
+    parser.add_argument("--count", type=int, default=100)
+    asyncio.run(main(parser.parse_args()))
@@ -1,12 +1,52 @@
 import os
+import sys
+import json
+import math
 import time
 import pydub
+import hashlib
 import argparse
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+MANIFEST_NAME = ".manifest.json"
+
+
+def file_hash(path):
+    h = hashlib.sha1()
+    with open(path, "rb") as fin:
+        for chunk in iter(lambda: fin.read(1024**2), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def convert(input_file, output_file, params):
+    start = time.time()
+    audio = pydub.AudioSegment.from_file(input_file)
+    load_time = time.time() - start
+
+    # Match mixer format (frequency, 16 bit samples, channels)
+    audio = audio.set_frame_rate(params["frequency"])
+    audio = audio.set_sample_width(2)
+    audio = audio.set_channels(params["channels"])
+    audio = audio[: int(1000 * params["max_duration_secs"])]
+    if params["target_dbfs"] is not None and audio.dBFS != float("-inf"):
+        # Gain limited by the peak headroom, loud transients do not clip
+        gain = params["target_dbfs"] - audio.dBFS
+        gain = min(gain, params["max_peak_dbfs"] - audio.max_dBFS)
+        audio = audio.apply_gain(gain)
+
+    tmp_file = "%s.tmp" % (output_file)
+    with open(tmp_file, "wb") as fout:
+        audio.export(fout, format=params["format"], bitrate="128k")
+    os.replace(tmp_file, output_file)
+    return load_time, time.time() - start
+
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(
         prog="Sound converter",
-        description="Converts sound files from input directory to output directory (44.1 kHz 128 kbit/s WAV)",
+        description="Converts sound files from input directory to output directory "
+        "(in mixer format, loudness normalized)",
     )
     parser.add_argument(
         "--input-dir", type=str, default="~/data/wheel-of-fortune/input_sounds/"
@@ -16,6 +56,21 @@ if __name__ == "__main__":
     )
     parser.add_argument("--max-duration-secs", type=float, default=120.0)
     parser.add_argument("--format", type=str, default="wav")
+    parser.add_argument("--frequency", type=int, default=44100)
+    parser.add_argument("--channels", type=int, default=2)
+    parser.add_argument(
+        "--target-dbfs",
+        type=float,
+        default=-20.0,
+        help="Target loudness (RMS dBFS), use nan to disable normalization",
+    )
+    parser.add_argument(
+        "--max-peak-dbfs",
+        type=float,
+        default=-1.0,
+        help="Peak level not exceeded by loudness normalization (dBFS)",
+    )
+    parser.add_argument("--jobs", type=int, default=os.cpu_count())
     args = parser.parse_args()
 
     input_dir = os.path.expanduser(args.input_dir)
@@ -23,32 +78,84 @@ if __name__ == "__main__":
     print("Input dir:", input_dir)
     print("Output dir:", output_dir)
 
+    params = {
+        "format": args.format,
+        "frequency": args.frequency,
+        "channels": args.channels,
+        "max_duration_secs": args.max_duration_secs,
+        "target_dbfs": None if math.isnan(args.target_dbfs) else args.target_dbfs,
+        "max_peak_dbfs": args.max_peak_dbfs,
+    }
+
+    # Manifest of converted files (output name -> source hash and parameters)
+    manifest_file = os.path.join(output_dir, MANIFEST_NAME)
+    manifest = {}
+    if os.path.isfile(manifest_file):
+        with open(manifest_file, "r") as fin:
+            manifest = json.load(fin)
+
+    # Output directory is flat, sounds are named by file name only
+    sources = {}
     for root_dir, _, files in os.walk(input_dir):
         for fname in files:
-            input_file = os.path.join(root_dir, fname)
-            output_file = os.path.join(
-                output_dir, "%s.%s" % (os.path.splitext(fname)[0], args.format)
-            )
-            print("Input: %s" % (input_file))
-            print("Output: %s" % (output_file))
+            output_name = "%s.%s" % (os.path.splitext(fname)[0], args.format)
+            sources.setdefault(output_name, []).append(os.path.join(root_dir, fname))
+    collisions = {name: files for name, files in sources.items() if len(files) > 1}
+    if len(collisions) > 0:
+        for output_name, input_files in sorted(collisions.items()):
+            print("Name collision: %s <- %s" % (output_name, ", ".join(input_files)))
+        sys.exit("Rename input files, output names must be unique")
 
-            if os.path.isfile(output_file):
-                print("Output file already exists, skip")
-                continue
+    jobs = {}
+    for output_name, (input_file,) in sources.items():
+        output_file = os.path.join(output_dir, output_name)
 
-            print("Load...")
-            start = time.time()
-            audio = pydub.AudioSegment.from_file(input_file)
-            print("Load done in %.1f s" % (time.time() - start))
-
-            print("Convert...")
-            start = time.time()
-            with open(output_file, "wb") as fout:
-                audio = audio.set_frame_rate(44100)
-                audio[: int(1000 * args.max_duration_secs)].export(
-                    fout, format=args.format, bitrate="128k"
-                )
+        source_hash = file_hash(input_file)
+        entry = manifest.get(output_name)
+        if (
+            os.path.isfile(output_file)
+            and entry is not None
+            and entry["hash"] == source_hash
+            and entry["params"] == params
+        ):
+            print("Unchanged, skip: %s" % (input_file))
+            continue
+        jobs[output_name] = (input_file, output_file, source_hash)
+
+    print("Converting %d files (%d jobs)..." % (len(jobs), args.jobs))
+    start = time.time()
+    with ProcessPoolExecutor(max_workers=args.jobs) as executor:
+        futures = {
+            executor.submit(convert, input_file, output_file, params): output_name
+            for output_name, (input_file, output_file, _) in jobs.items()
+        }
+        for future in as_completed(futures):
+            output_name = futures[future]
+            input_file, output_file, source_hash = jobs[output_name]
+            try:
+                load_time, total_time = future.result()
+            except Exception as e:
+                print("Failed: %s (%s)" % (input_file, repr(e)))
+                continue
             print(
-                "Conversion done in %.1f s (%.3f MB)"
-                % (time.time() - start, os.path.getsize(output_file) / 1024.0**2)
+                "Converted %s -> %s in %.1f s (load %.1f s, %.3f MB)"
+                % (
+                    input_file,
+                    output_file,
+                    total_time,
+                    load_time,
+                    os.path.getsize(output_file) / 1024.0**2,
+                )
             )
+            manifest[output_name] = {
+                "source": os.path.relpath(input_file, input_dir),
+                "hash": source_hash,
+                "params": params,
+            }
+
+            # Save after every file, so that interrupted run can be resumed
+            with open("%s.tmp" % (manifest_file), "w") as fout:
+                json.dump(manifest, fout, indent=4)
+            os.replace("%s.tmp" % (manifest_file), manifest_file)
+
+    print("Done in %.1f s" % (time.time() - start))
@@ -1,12 +1,18 @@
 import os
 import logging
-import coloredlogs
 import importlib.metadata
+from ._startup import startup_profile
+from ._config import Config
+from ._logging import setup_logging
+from ._server import server_options
 from .dependencies import startup_event, shutdown_event
+from .routers import debug
 from .routers import encoder
+from .routers import health
 from .routers import servos
 from .routers import leds
 from .routers import soundsystem
+from .routers import spins
 from .routers import wheel
 from .routers import ws
 
@@ -18,18 +24,19 @@ from fastapi.staticfiles import StaticFiles
 _LOGGER = logging.getLogger(__name__)
 _VERSION = importlib.metadata.version("wheel_of_fortune")
 
-coloredlogs.install(
-    level="debug",
-    fmt="%(asctime)s %(name)s:%(lineno)d %(levelname)s %(message)s",
-    milliseconds=True,
-)
+config = Config()
+setup_logging(config)
+startup_profile.mark("imports")
 
 app = FastAPI(docs_url="/api/v1/docs", openapi_url="/api/v1/openapi.json")
 
+app.include_router(debug.router)
 app.include_router(encoder.router)
+app.include_router(health.router)
 app.include_router(servos.router)
 app.include_router(leds.router)
 app.include_router(soundsystem.router)
+app.include_router(spins.router)
 app.include_router(wheel.router)
 app.include_router(ws.router)
 
@@ -44,25 +51,26 @@ app.add_middleware(
 local_www_path = os.environ.get("LOCAL_WWW_PATH")
 if local_www_path is not None:
     if os.path.isdir(local_www_path):
-        _LOGGER.info("local www path: %s" % (local_www_path))
+        _LOGGER.info("local www path: %s", local_www_path)
         app.mount(
             "/local", StaticFiles(directory=local_www_path, html=True), name="local"
         )
     else:
-        _LOGGER.warning("local www path does not exist: %s" % (local_www_path))
+        _LOGGER.warning("local www path does not exist: %s", local_www_path)
 
 frontend_path = os.path.join(os.path.dirname(__file__), "frontend", "dist")
 if os.path.isdir(frontend_path):
     app.mount("/", StaticFiles(directory=frontend_path, html=True), name="frontend")
 else:
-    _LOGGER.warning("frontend path does not exist: %s" % (frontend_path))
+    _LOGGER.warning("frontend path does not exist: %s", frontend_path)
 
 
 @app.on_event("startup")
 async def api_startup_event():
-    _LOGGER.info("version: %s" % (_VERSION))
+    _LOGGER.info("version: %s", _VERSION)
     _LOGGER.info("startup_event")
     await startup_event()
+    startup_profile.mark("api ready")
 
 
 @app.on_event("shutdown")
@@ -72,4 +80,5 @@ async def api_shutdown_event():
 
 
 if __name__ == "__main__":
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    _LOGGER.info("server profile: %s", config.server_profile)
+    uvicorn.run(app, **server_options(config))
@@ -10,6 +10,15 @@ __all__ = [
 class ServoConfig(BaseSettings):
     name: str
     mount_angle: float
+    max_speed: float = 1.5  # positions per second
+    max_accel: float = 6.0  # positions per second squared
+    motion_profile: str = "scurve"  # "trapezoidal" or "scurve"
+
+
+class SoundGroupConfig(BaseSettings):
+    name: str
+    priority: int = 0  # Voices of higher priority groups can steal lower ones
+    max_voices: int = 2
 
 
 class WLedSegmentConfig(BaseSettings):
@@ -24,9 +33,48 @@ class Config(BaseSettings):
     logo_url: str = "local/logo.svg"
     data_dir: str = "./data"
     num_sectors: int = 16
+    startup_profile: bool = False  # Log timings of startup phases
+    log_level: str | None = None  # Defaults to "info" in production, else "debug"
+    log_handler: str = "colored"  # "colored" or "plain"
+    log_rate_limit: float = 20.0  # Records per second per module, 0 unlimited
+    log_rate_burst: int = 100
+    # Chatty modules (logger names) rate limited, records of others always pass
+    log_rate_limited: list[str] = [
+        "wheel_of_fortune._encoder",
+        "wheel_of_fortune._servos",
+        "wheel_of_fortune._wled",
+    ]
+    log_rate_limits: dict[str, float] = {}  # Per module overrides, also limited
+
+    server_profile: str = "production"  # "production" or "development"
+    server_host: str = "0.0.0.0"
+    server_port: int = 8000
+    server_keepalive_secs: int = 30  # Longer than client poll intervals
+    server_ws_ping_secs: float = 10.0
+    server_ws_ping_timeout_secs: float = 10.0
+    server_ws_max_size: int = 1024**2  # Clients only send small state updates
+    server_ws_max_queue: int = 16  # Received messages buffered per connection
+
+    spin_store_file: str | None = None  # Defaults to <data_dir>/spins.db
+    spin_store_flush_secs: float = 5.0
+    content_reload: bool = True  # Reload themes, effects and sounds on change
+    content_cache_dir: str | None = None  # Defaults to <data_dir>/cache/content
+    loop_lag_sample_secs: float = 0.25
+    loop_lag_warning_secs: float = 0.05
+    # Report callbacks blocking the loop longer, None off
+    loop_slow_callback_secs: float | None = 0.05
+    loop_watchdog_secs: float = 0.1  # Heartbeat and watchdog check period
+    debug_profile_max_secs: float = 30.0
 
     wled_url: str | None = None
     wled_segments: list[WLedSegmentConfig] = []
+    wled_transport: str = "ws"  # "ws" or "http"
+    wled_max_connections: int = 2
+    wled_keepalive_secs: float = 30.0
+    wled_timeout_secs: float = 5.0
+    wled_retries: int = 2
+    wled_retry_backoff_secs: float = 0.1
+    wled_reconnect_secs: float = 1.0
 
     servos: list[ServoConfig] = [
         ServoConfig(name="bottom", mount_angle=math.radians(0.0)),
@@ -36,6 +84,23 @@ class Config(BaseSettings):
     servo_zero_duty: float = 0.0912
     servo_full_duty: float = 0.0516
     servo_mount_duty: float = 0.0473
+    servo_update_rate: float = 25.0  # Hz
+    servo_detach_timeout: float = 15.0  # secs holding still before detach, -1 off
+
+    settings_debounce_secs: float = 2.0
+    settings_max_delay_secs: float = 10.0
+    settings_journal: bool = False  # Append changes instead of rewriting file
+    settings_journal_max_ops: int = 200  # Compact journal into settings file
+
+    sound_mixer_frequency: int = 44100
+    sound_mixer_buffer: int = 512  # samples, smaller means lower latency
+    sound_voices: int = 8  # mixer channels shared by sound groups
+    sound_groups: list[SoundGroupConfig] = [  # Must contain "effect" group
+        SoundGroupConfig(name="effect", priority=1, max_voices=4),
+        SoundGroupConfig(name="ui", priority=0, max_voices=2),
+    ]
+    sound_cache_mb: float = 128.0
+    sound_cache_dir: str | None = None  # Defaults to <data_dir>/cache/sounds
 
     influxdb_url: str | None = None
     influxdb_token: str | None = None
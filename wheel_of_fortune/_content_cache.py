@@ -0,0 +1,98 @@
+import os
+import json
+import yaml
+import hashlib
+import logging
+import importlib.metadata
+from typing import Any, Callable
+from pydantic import TypeAdapter
+
+_LOGGER = logging.getLogger(__name__)
+VERSION = importlib.metadata.version("wheel_of_fortune")
+
+__all__ = [
+    "ContentCache",
+    "load_yaml",
+]
+
+# libyaml based loader is much faster than the pure Python one
+YamlLoader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+
+def load_yaml(filename: str) -> Any:
+    with open(filename, "r") as fin:
+        return yaml.load(fin, Loader=YamlLoader)
+
+
+class ContentCache:
+    """Cache of compiled and validated content definitions as JSON.
+
+    The first line of a cache file holds the key (package version, source
+    file size, mtime and hash), the rest is the content, which is validated
+    by pydantic directly from JSON. Source files are hashed only if their
+    size or mtime changed.
+    """
+
+    def __init__(self, cache_dir: str):
+        self._cache_dir: str = cache_dir
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def load(
+        self, filename: str, adapter: TypeAdapter, compile_content: Callable[[str], Any]
+    ) -> Any:
+        """Returns cached content of filename, compiles and stores it on miss."""
+        cache_file = self._cache_file(filename)
+        if os.path.isfile(cache_file):
+            try:
+                with open(cache_file, "rb") as fin:
+                    key = json.loads(fin.readline())
+                    if self._is_valid(key, filename):
+                        res = adapter.validate_json(fin.read())
+                        _LOGGER.info(
+                            "loaded from cache: %s", os.path.basename(filename)
+                        )
+                        return res
+            except Exception:
+                _LOGGER.exception("invalid content cache, ignoring: %s", cache_file)
+
+        # Key before compiling, a file changed meanwhile is compiled again
+        key = self._key(filename)
+        res = compile_content(filename)
+        tmp_file = "%s.tmp" % (cache_file)
+        try:
+            with open(tmp_file, "wb") as fout:
+                fout.write(json.dumps(key).encode() + b"\n")
+                fout.write(adapter.dump_json(res))
+            os.replace(tmp_file, cache_file)
+        except OSError:
+            _LOGGER.exception("unable to write content cache: %s", cache_file)
+        return res
+
+    def _is_valid(self, key: dict[str, Any], filename: str) -> bool:
+        if key.get("version") != VERSION:
+            return False
+        stat = os.stat(filename)
+        if key["size"] == stat.st_size and key["mtime_ns"] == stat.st_mtime_ns:
+            return True
+        # Touched, but maybe not changed
+        return key["hash"] == file_hash(filename)
+
+    def _key(self, filename: str) -> dict[str, Any]:
+        stat = os.stat(filename)
+        return {
+            "version": VERSION,
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+            "hash": file_hash(filename),
+        }
+
+    def _cache_file(self, filename: str) -> str:
+        return os.path.join(self._cache_dir, "%s.json" % (os.path.basename(filename)))
+
+
+def file_hash(filename: str) -> str:
+    h = hashlib.sha1()
+    with open(filename, "rb") as fin:
+        for chunk in iter(lambda: fin.read(1024**2), b""):
+            h.update(chunk)
+    return h.hexdigest()
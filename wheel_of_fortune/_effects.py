@@ -1,7 +1,8 @@
-import yaml
 import logging
-import mergedeep
-from .schemas import EffectInfo
+from pydantic import TypeAdapter
+from ._inheritance import compile_definitions
+from ._content_cache import ContentCache, load_yaml
+from .schemas import EffectInfo, KeyframeInfo, TimelineAction
 
 
 _LOGGER = logging.getLogger(__name__)
@@ -9,6 +10,35 @@ _LOGGER = logging.getLogger(__name__)
 __all__ = [
     "Effect",
     "load_effects",
+    "DEFAULT_TIMELINE",
+]
+
+
+# Used for effects without explicit timeline
+DEFAULT_TIMELINE = [
+    KeyframeInfo(at=0.0, action=TimelineAction.SERVOS, pos=1.0),
+    KeyframeInfo(
+        at=2.0,
+        action=TimelineAction.VOLUME_SWEEP,
+        channel="main",
+        volume_from=1.0,
+        volume_to=0.2,
+        time_ms=1000,
+    ),
+    KeyframeInfo(at=3.2, action=TimelineAction.LEDS),
+    KeyframeInfo(at=3.2, action=TimelineAction.SOUND_PLAY, channel="effect"),
+    KeyframeInfo(
+        at=7.2,
+        action=TimelineAction.VOLUME_SWEEP,
+        channel="main",
+        volume_from=0.2,
+        volume_to=1.0,
+        time_ms=1000,
+    ),
+    KeyframeInfo(at=12.2, action=TimelineAction.SERVOS, pos=0.0, motors="all"),
+    KeyframeInfo(
+        at=16.2, action=TimelineAction.SOUND_FADEOUT, channel="main", time_ms=2000
+    ),
 ]
 
 
@@ -16,37 +46,31 @@ class Effect(EffectInfo):
     def get_info(self) -> EffectInfo:
         return self
 
+    def get_timeline(self) -> list[KeyframeInfo]:
+        if len(self.timeline) > 0:
+            return self.timeline
+        return DEFAULT_TIMELINE
+
+
+_ADAPTER = TypeAdapter(dict[str, Effect])
 
-def load_effects(filename: str):
-    _LOGGER.info("load effects: %s" % (filename))
 
-    def merge(base, addition):
-        res = mergedeep.merge({}, base, addition)
-        res["based_on"] = base.get("based_on", []) + addition.get("based_on", [])
-        res["visible"] = addition.get("visible", True)
-        return res
+def load_effects(filename: str, cache: ContentCache | None = None) -> dict[str, Effect]:
+    _LOGGER.info("load effects: %s", filename)
+    if cache is not None:
+        return cache.load(filename, _ADAPTER, _compile_effects)
+    return _compile_effects(filename)
 
-    def compile(effect_id):
-        effect = effects[effect_id]
-        if "based_on" in effect:
-            res = {}
-            for base_id in effect["based_on"]:
-                base_effect = compile(base_id)
-                res = merge(base_effect, effect)
-            return res
-        else:
-            return effect
 
+def _compile_effects(filename: str) -> dict[str, Effect]:
     try:
-        with open(filename, "r") as fin:
-            effects = yaml.safe_load(fin)
+        effects = load_yaml(filename)
     except Exception as e:
         raise RuntimeError("Error on loading %s file" % (filename)) from e
 
     res = {}
-    for effect_id, effect in effects.items():
-        if not effect.get("visible", True):
+    for effect_id, params in compile_definitions(effects, kind="effect").items():
+        if not params.get("visible", True):
             continue
-        params = compile(effect_id)
         res[effect_id] = Effect.model_validate(params)
     return res
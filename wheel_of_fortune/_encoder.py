@@ -89,15 +89,13 @@ class Encoder:
             if counter % log_cycles == 0:
                 state = self.get_state()
                 _LOGGER.info(
-                    "sector: %d, rpm %.1f (%d pulses in %.1f ms), total_revs: %.1f, missed_sectors: %d"
-                    % (
-                        state.sector,
-                        state.rpm,
-                        dpulses,
-                        1e3 * dtime,
-                        state.total_revs,
-                        state.missed_sector_count,
-                    )
+                    "sector: %d, rpm %.1f (%d pulses in %.1f ms), total_revs: %.1f, missed_sectors: %d",
+                    state.sector,
+                    state.rpm,
+                    dpulses,
+                    1e3 * dtime,
+                    state.total_revs,
+                    state.missed_sector_count,
                 )
 
             report_cycles = 10 if self._is_standstill else 1
@@ -117,8 +115,9 @@ class Encoder:
 
     async def test(self, initial_speed=20.0, drag_factor=0.1):
         _LOGGER.info(
-            "starting test (initial speed: %.2f, drag_factor: %.2f)..."
-            % (initial_speed, drag_factor)
+            "starting test (initial speed: %.2f, drag_factor: %.2f)...",
+            initial_speed,
+            drag_factor,
         )
         # speed: [sectors per sec]
         # drag_factor: speed is reduced by drag_factor * speed for every sector
@@ -139,8 +138,11 @@ class Encoder:
             cur_speed = cur_speed - drag_factor * cur_speed
 
             _LOGGER.info(
-                "test %d -> %d, speed %.2f, time per sector: %.1f"
-                % (cur_sector, self._sector, cur_speed, 1.0 / cur_speed)
+                "test %d -> %d, speed %.2f, time per sector: %.1f",
+                cur_sector,
+                self._sector,
+                cur_speed,
+                1.0 / cur_speed,
             )
         _LOGGER.info("test finished.")
 
@@ -159,7 +161,7 @@ class Encoder:
         try:
             delay = self._loop.time() - t
             if delay > 10e-3:
-                _LOGGER.warning("encoder_update delay %.3f ms" % (1e3 * delay))
+                _LOGGER.warning("encoder_update delay %.3f ms", 1e3 * delay)
 
             self._speed_pulse_count += 1
             old_sector = self._sector
@@ -172,9 +174,7 @@ class Encoder:
             if (old_sector + 1) % n != new_sector and (
                 old_sector - 1 + n
             ) % n != new_sector:
-                _LOGGER.warning(
-                    "WARN: skipped sector %d -> %d" % (old_sector, new_sector)
-                )
+                _LOGGER.warning("WARN: skipped sector %d -> %d", old_sector, new_sector)
                 self._missed_sector_count += 1
 
             self._sector = new_sector
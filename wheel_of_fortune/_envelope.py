@@ -0,0 +1,217 @@
+import time
+import bisect
+import asyncio
+import logging
+import threading
+from typing import Callable
+
+_LOGGER = logging.getLogger(__name__)
+
+__all__ = [
+    "Envelope",
+    "EnvelopeEngine",
+    "VolumeControl",
+]
+
+# Gain used instead of zero for exponential (dB linear) ramps
+MIN_GAIN = 1e-3
+
+
+class Envelope:
+    """Gain curve through keyframes (time [s], gain), linear or exponential."""
+
+    def __init__(self, keyframes: list[tuple[float, float]], curve: str = "linear"):
+        if len(keyframes) == 0:
+            raise ValueError("Envelope needs at least one keyframe")
+        if curve not in ("linear", "exponential"):
+            raise ValueError("unknown envelope curve: %s" % (curve))
+        self._times: list[float] = [t for t, _ in keyframes]
+        self._gains: list[float] = [g for _, g in keyframes]
+        if self._times != sorted(self._times):
+            raise ValueError("Envelope keyframes must be sorted by time")
+        self._curve: str = curve
+        self.duration: float = self._times[-1]
+
+    def value(self, t: float) -> float:
+        i = bisect.bisect_right(self._times, t)
+        if i <= 0:
+            return self._gains[0]
+        if i >= len(self._times):
+            return self._gains[-1]
+
+        t0, t1 = self._times[i - 1], self._times[i]
+        g0, g1 = self._gains[i - 1], self._gains[i]
+        u = (t - t0) / (t1 - t0)
+        if self._curve == "linear":
+            return g0 + u * (g1 - g0)
+        g0, g1 = max(g0, MIN_GAIN), max(g1, MIN_GAIN)
+        return g0 * (g1 / g0) ** u
+
+
+class EnvelopeHandle:
+    def __init__(self, control, envelope, start_time, future):
+        self._control: VolumeControl = control
+        self._envelope: Envelope = envelope
+        self._start_time: float = start_time
+        self._future: asyncio.Future = future
+        self._hold: float | None = None  # Gain after finish or cancel
+
+    @property
+    def finished(self) -> bool:
+        return self._hold is not None
+
+    def value(self, now: float) -> float:
+        if self._hold is not None:
+            return self._hold
+        return self._envelope.value(now - self._start_time)
+
+    def cancel(self):
+        """Stops the envelope, holding its current gain."""
+        self._control._finish(self, time.monotonic())
+
+    async def wait(self):
+        await asyncio.shield(self._future)
+
+
+class VolumeControl:
+    """Volume of one mixer channel: base volume times active envelope gains.
+
+    Concurrent envelopes are multiplied. The gain of the last finished
+    envelope is held until a new envelope is started or the control is reset.
+    """
+
+    def __init__(self, engine, set_volume):
+        self._engine: EnvelopeEngine = engine
+        self._set_volume: Callable[[float], None] = set_volume
+        self._lock = threading.Lock()
+        self._base_volume: float = 1.0
+        self._handles: list[EnvelopeHandle] = []
+
+    def set_base_volume(self, volume: float):
+        with self._lock:
+            self._base_volume = volume
+        self.apply(time.monotonic())
+
+    def reset(self):
+        with self._lock:
+            handles, self._handles = self._handles, []
+        for handle in handles:
+            self._resolve(handle)
+        self.apply(time.monotonic())
+
+    def start(self, envelope: Envelope) -> EnvelopeHandle:
+        loop = asyncio.get_running_loop()
+        handle = EnvelopeHandle(self, envelope, time.monotonic(), loop.create_future())
+        with self._lock:
+            self._handles = [h for h in self._handles if not h.finished]
+            self._handles.append(handle)
+        self._engine.wakeup()
+        return handle
+
+    @property
+    def active(self) -> bool:
+        with self._lock:
+            return any(not h.finished for h in self._handles)
+
+    def apply(self, now: float):
+        # Called from engine thread and event loop
+        finished = []
+        with self._lock:
+            volume = self._base_volume
+            for handle in self._handles:
+                volume *= handle.value(now)
+                if not handle.finished and now - handle._start_time >= (
+                    handle._envelope.duration
+                ):
+                    finished.append(handle)
+        self._set_volume(max(0.0, min(1.0, volume)))
+        for handle in finished:
+            self._finish(handle, now)
+
+    def abort(self):
+        """Finishes all active envelopes at their current gain."""
+        now = time.monotonic()
+        with self._lock:
+            unfinished = [h for h in self._handles if not h.finished]
+        for handle in unfinished:
+            self._finish(handle, now)
+
+    def _finish(self, handle: EnvelopeHandle, now: float):
+        with self._lock:
+            if handle._hold is None:
+                handle._hold = handle._envelope.value(now - handle._start_time)
+        self._resolve(handle)
+
+    def _resolve(self, handle: EnvelopeHandle):
+        future = handle._future
+        future.get_loop().call_soon_threadsafe(_set_future_done, future)
+
+
+def _set_future_done(future: asyncio.Future):
+    if not future.done():
+        future.set_result(None)
+
+
+class EnvelopeEngine:
+    """Applies volume envelopes at fixed rate from a dedicated thread.
+
+    Ramps are stepped at the engine rate (100 Hz by default), the mixer
+    channel volume is not automated per sample.
+    """
+
+    def __init__(self, rate: float = 100.0):
+        self._period: float = 1.0 / rate
+        self._controls: list[VolumeControl] = []
+        self._wakeup = threading.Event()
+        self._stopped = False
+        self._thread = threading.Thread(
+            target=self._run, name="envelope_engine", daemon=True
+        )
+
+    def create_control(self, set_volume: Callable[[float], None]) -> VolumeControl:
+        control = VolumeControl(self, set_volume)
+        self._controls.append(control)
+        return control
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stopped = True
+        self._wakeup.set()
+
+    def wakeup(self):
+        self._wakeup.set()
+
+    def _run(self):
+        next_time = time.monotonic()
+        while not self._stopped:
+            try:
+                next_time = self._step(next_time)
+            except Exception:
+                # Never leave waiters of envelopes hanging
+                _LOGGER.exception("error in envelope engine, abort envelopes")
+                for control in self._controls:
+                    try:
+                        control.abort()
+                    except Exception:
+                        _LOGGER.exception("unable to abort envelopes")
+                next_time = time.monotonic()
+
+    def _step(self, next_time: float) -> float:
+        active = [c for c in self._controls if c.active]
+        if len(active) == 0:
+            self._wakeup.wait()
+            self._wakeup.clear()
+            return time.monotonic()
+
+        now = time.monotonic()
+        for control in active:
+            try:
+                control.apply(now)
+            except Exception:
+                _LOGGER.exception("error while applying envelope")
+
+        next_time = max(next_time + self._period, time.monotonic())
+        time.sleep(max(0.0, next_time - time.monotonic()))
+        return next_time
@@ -0,0 +1,88 @@
+import logging
+from typing import Any
+
+_LOGGER = logging.getLogger(__name__)
+
+__all__ = [
+    "compile_definitions",
+    "merge_definitions",
+]
+
+
+def merge_definitions(base: dict[str, Any], addition: dict[str, Any]) -> dict:
+    """Deep merge of addition into base (new dicts, values are shared)."""
+    res = dict(base)
+    for key, value in addition.items():
+        base_value = res.get(key)
+        if isinstance(value, dict) and isinstance(base_value, dict):
+            res[key] = merge_definitions(base_value, value)
+        else:
+            res[key] = value
+    return res
+
+
+def compile_definitions(
+    definitions: dict[str, dict[str, Any]], kind: str = "definition"
+) -> dict[str, dict[str, Any]]:
+    """Resolves based_on inheritance of all definitions.
+
+    Bases are merged in order (later bases override earlier ones), the
+    definition itself is merged last. Every definition is compiled once, in
+    topological order. Compiled based_on lists all ancestors, visible is
+    never inherited. Raises ValueError on unknown bases and cycles.
+    """
+    compiled: dict[str, dict[str, Any]] = {}
+
+    for root_id in definitions:
+        if root_id in compiled:
+            continue
+
+        # Iterative depth first search, bases are compiled before descendants
+        path: list[str] = []
+        on_path: set[str] = set()
+        stack: list[tuple[str, bool]] = [(root_id, False)]
+        while len(stack) > 0:
+            def_id, bases_done = stack.pop()
+            if bases_done:
+                compiled[def_id] = _compile_one(definitions[def_id], compiled)
+                on_path.discard(path.pop())
+                continue
+            if def_id in compiled:
+                continue
+            if def_id in on_path:
+                cycle = path[path.index(def_id) :] + [def_id]
+                raise ValueError(
+                    "cyclic based_on of %s: %s" % (kind, " -> ".join(cycle))
+                )
+
+            path.append(def_id)
+            on_path.add(def_id)
+            stack.append((def_id, True))
+            for base_id in reversed(definitions[def_id].get("based_on", [])):
+                if base_id not in definitions:
+                    raise ValueError(
+                        "unknown base %s '%s' of '%s'" % (kind, base_id, def_id)
+                    )
+                if base_id not in compiled:
+                    stack.append((base_id, False))
+
+    _LOGGER.debug("compiled %d %ss", len(compiled), kind)
+    return compiled
+
+
+def _compile_one(definition: dict[str, Any], compiled: dict[str, dict]) -> dict:
+    base_ids = definition.get("based_on", [])
+    if len(base_ids) == 0:
+        return definition
+
+    res: dict[str, Any] = {}
+    ancestors: list[str] = []
+    for base_id in base_ids:
+        base = compiled[base_id]
+        res = merge_definitions(res, base)
+        ancestors.extend(base.get("based_on", []))
+        ancestors.append(base_id)
+    res = merge_definitions(res, definition)
+    res["based_on"] = list(dict.fromkeys(ancestors))
+    res["visible"] = definition.get("visible", True)
+    return res
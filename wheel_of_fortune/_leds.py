@@ -1,9 +1,9 @@
 import asyncio
-import aiohttp
 import logging
 from typing import Callable
 from ._config import Config
 from ._settings import Settings
+from ._wled import WledClient
 from .schemas import (
     LedSegmentState,
     LedSegmentStateIn,
@@ -112,8 +112,9 @@ class LedSegment:
 
 
 class LedController:
-    def __init__(self, config, settings, update_cb):
+    def __init__(self, config, wled, settings, update_cb):
         self._config: Config = config
+        self._wled: WledClient = wled
         self._settings: Settings = settings
         self._update_cb: Callable[[LedsState], None] = update_cb
         self._loop = asyncio.get_running_loop()
@@ -124,31 +125,16 @@ class LedController:
         for segment in config.wled_segments:
             self._segments[segment.name] = LedSegment(segment.start, segment.stop)
 
-        self._session: aiohttp.ClientSession | None = None
-        self._info = {}
-
     async def open(self):
         _LOGGER.info("open")
-        self._session = aiohttp.ClientSession(
-            base_url=self._config.wled_url,  # type: ignore
-            raise_for_status=True,  # type: ignore
-        )
         if "brightness" in self._settings:
             self._brightness = self._settings["brightness"]
 
-        resp = await self._session.get("/json/info")
-        self._info = await resp.json()
-        _LOGGER.debug("info: %s" % (self._info))
-
     async def close(self):
-        if self._session is None:
-            return
-        _LOGGER.info("close")
-        await self._session.close()
-        _LOGGER.info("close done.")
+        pass
 
     async def set_state(self, state: LedsStateIn):
-        _LOGGER.info("set_state: %s" % (state))
+        _LOGGER.info("set_state: %s", state)
         if state.brightness is not None:
             self._brightness = state.brightness
             self._settings.set("brightness", state.brightness)
@@ -173,21 +159,14 @@ class LedController:
 
     def get_info(self) -> LedsInfo:
         return LedsInfo(
-            version=self._info.get("ver", "unknown"),
+            version=self._wled.get_info().get("ver", "unknown"),
         )
 
     async def maintain(self):
         while True:
-            # if self._session:
-            #     resp = await self._session.get("/json/state")
-            #     state = await resp.json()
-            #     _LOGGER.info("led state: %s" % (state))
             await asyncio.sleep(100.0)
 
     async def _sync_state(self, sync_segments=True, transition_ms=0.0):
-        if self._session is None:
-            raise ConnectionError("Session is not opened.")
-
         int_brightness = int(round(255 * self._brightness))
         state = {
             "on": int_brightness > 0,
@@ -201,5 +180,5 @@ class LedController:
                 segment_states.append({"stop": 0})
             state["seg"] = segment_states
 
-        await self._session.post("/json/state", json=state)
+        await self._wled.update_state(state)
         self._loop.call_soon(self._update_cb, self.get_state())
@@ -0,0 +1,127 @@
+import sys
+import time
+import queue
+import atexit
+import threading
+import logging
+import logging.handlers
+import coloredlogs
+from ._config import Config
+
+__all__ = [
+    "setup_logging",
+]
+
+LOG_FORMAT = "%(asctime)s %(name)s:%(lineno)d %(levelname)s %(message)s"
+DATE_FORMAT = "%Y-%m-%d %H:%M:%S"
+DEFAULT_LOG_LEVELS = {
+    "production": "info",
+    "development": "debug",
+}
+
+
+def log_level(config: Config) -> str:
+    if config.log_level is not None:
+        return config.log_level
+    return DEFAULT_LOG_LEVELS.get(config.server_profile, "debug")
+
+
+class RateLimitFilter(logging.Filter):
+    """Token bucket per logger, drops records of modules flooding the log.
+
+    Added to the loggers of chatty modules only, as logger filters do not see
+    records of child loggers. Errors are never dropped. The number of dropped
+    records is appended to the next record that passes.
+    """
+
+    def __init__(self, rate: float, burst: int, module_rates: dict[str, float]):
+        super().__init__()
+        self._rate: float = rate
+        self._burst: int = burst
+        self._module_rates: dict[str, float] = module_rates
+        # Logger name -> [tokens, last update time, dropped records]
+        self._buckets: dict[str, list] = {}
+        # Records are filtered in the logging thread, which may be any thread
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.ERROR:
+            return True
+        rate = self._module_rates.get(record.name, self._rate)
+        if rate <= 0:
+            return True
+
+        with self._lock:
+            now = time.monotonic()
+            bucket = self._buckets.get(record.name)
+            if bucket is None:
+                bucket = [float(self._burst), now, 0]
+                self._buckets[record.name] = bucket
+            bucket[0] = min(float(self._burst), bucket[0] + rate * (now - bucket[1]))
+            bucket[1] = now
+            if bucket[0] < 1.0:
+                bucket[2] += 1
+                return False
+            bucket[0] -= 1.0
+            dropped, bucket[2] = bucket[2], 0
+
+        if dropped > 0:
+            record.msg = "%s (%d earlier messages dropped)" % (record.msg, dropped)
+        return True
+
+
+class LazyQueueHandler(logging.handlers.QueueHandler):
+    """Queues records as they are, formatting is done by the listener thread.
+
+    Unlike QueueHandler.prepare() the message is not formatted by the caller,
+    which is fine as long as the queue stays in this process. Arguments are
+    formatted later, so must not be mutated after logging.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+def console_handler(config: Config) -> logging.Handler:
+    handler = logging.StreamHandler()
+    if config.log_handler == "colored":
+        fmt = LOG_FORMAT.replace("%(asctime)s", "%(asctime)s,%(msecs)03d")
+        # Like coloredlogs.install(), no escape sequences if not a terminal
+        if coloredlogs.terminal_supports_colors(sys.stderr):
+            handler.setFormatter(coloredlogs.ColoredFormatter(fmt, DATE_FORMAT))
+        else:
+            handler.setFormatter(logging.Formatter(fmt, DATE_FORMAT))
+    elif config.log_handler == "plain":
+        # No colors, for journald and log shippers
+        handler.setFormatter(
+            logging.Formatter(
+                LOG_FORMAT.replace("%(asctime)s", "%(asctime)s.%(msecs)03d"),
+                DATE_FORMAT,
+            )
+        )
+    else:
+        raise ValueError("unknown log handler: %s" % (config.log_handler))
+    return handler
+
+
+def setup_logging(config: Config):
+    """Logs through a queue, written to the console by a background thread.
+
+    Logging calls only filter and enqueue records, so they never block on
+    console or journal writes.
+    """
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    queue_handler = LazyQueueHandler(log_queue)
+    rate_limit_filter = RateLimitFilter(
+        config.log_rate_limit, config.log_rate_burst, config.log_rate_limits
+    )
+    for name in set(config.log_rate_limited) | set(config.log_rate_limits):
+        logging.getLogger(name).addFilter(rate_limit_filter)
+    listener = logging.handlers.QueueListener(log_queue, console_handler(config))
+    listener.start()
+    # Runs before logging.shutdown (registered earlier), flushes the queue
+    atexit.register(listener.stop)
+
+    root_logger = logging.getLogger()
+    root_logger.handlers = [queue_handler]
+    root_logger.setLevel(log_level(config).upper())
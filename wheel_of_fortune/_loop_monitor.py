@@ -0,0 +1,253 @@
+import os
+import sys
+import time
+import asyncio
+import logging
+import threading
+import collections
+from ._config import Config
+from ._telemetry import Telemetry, Point
+from .schemas import LoopStatsState, SlowCallbackInfo
+
+_LOGGER = logging.getLogger(__name__)
+
+__all__ = [
+    "LoopMonitor",
+]
+
+STATS_REPORT_SECS = 10.0
+NUM_SLOWEST = 5
+# Innermost frames of a blocked loop thread kept in the report
+NUM_BLOCKED_FRAMES = 3
+
+
+def frame_name(frame) -> str:
+    code = frame.f_code
+    return "%s (%s:%d)" % (
+        getattr(code, "co_qualname", code.co_name),
+        os.path.basename(code.co_filename),
+        code.co_firstlineno,
+    )
+
+
+def sample_stacks(
+    thread_id: int, duration: float, interval: float
+) -> collections.Counter[str]:
+    """Samples the stack of a thread, returns counts of folded stacks.
+
+    Folded stacks list frames root first, separated by ";", as used by
+    flamegraph.pl and speedscope. Blocks for duration, run in a worker thread.
+    """
+    counts: collections.Counter[str] = collections.Counter()
+    end_time = time.monotonic() + duration
+    while time.monotonic() < end_time:
+        frame = sys._current_frames().get(thread_id)
+        stack = []
+        while frame is not None:
+            stack.append(frame_name(frame))
+            frame = frame.f_back
+        if len(stack) > 0:
+            counts[";".join(reversed(stack))] += 1
+        del frame
+        time.sleep(interval)
+    return counts
+
+
+def describe_blocked(loop: asyncio.AbstractEventLoop, thread_id: int) -> str:
+    """Current task and innermost frames of a thread blocked in its loop.
+
+    Called from another thread while the loop is blocked, works with any
+    loop implementation as only the thread stack is inspected.
+    """
+    frame = sys._current_frames().get(thread_id)
+    stack = []
+    while frame is not None and len(stack) < NUM_BLOCKED_FRAMES:
+        stack.append(frame_name(frame))
+        frame = frame.f_back
+    del frame
+    name = " < ".join(stack) if len(stack) > 0 else "unknown"
+    task = asyncio.current_task(loop)
+    if task is not None:
+        name = "%s: %s" % (task.get_name(), name)
+    return name
+
+
+class LoopStats:
+    """Event loop lag and slow callback statistics of one reporting period."""
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.lag_samples: int = 0
+        self.lag_sum: float = 0.0
+        self.lag_max: float = 0.0
+        self.slow_callbacks: int = 0
+        self.slowest: list[tuple[float, str]] = []
+
+    def add_lag(self, lag: float):
+        self.lag_samples += 1
+        self.lag_sum += lag
+        self.lag_max = max(self.lag_max, lag)
+
+    def add_slow_callback(self, name: str, duration: float):
+        self.slow_callbacks += 1
+        self.slowest.append((duration, name))
+        self.slowest.sort(reverse=True)
+        del self.slowest[NUM_SLOWEST:]
+
+    def get_state(self) -> LoopStatsState:
+        return LoopStatsState(
+            lag_avg_ms=(
+                1e3 * self.lag_sum / self.lag_samples if self.lag_samples > 0 else None
+            ),
+            lag_max_ms=1e3 * self.lag_max,
+            slow_callbacks=self.slow_callbacks,
+            slowest=[
+                SlowCallbackInfo(name=name, duration_ms=1e3 * duration)
+                for duration, name in self.slowest
+            ],
+        )
+
+
+class LoopMonitor:
+    """Measures event loop lag and reports callbacks blocking the loop.
+
+    Lag is the delay of a periodic probe beyond its scheduled time. Slow
+    callbacks are found by a watchdog thread: a heartbeat callback of the
+    loop is expected every watchdog period, when it is late by the threshold
+    the stack of the loop thread is captured while still blocked. The
+    duration is how late the heartbeat ran, so blocking is detected with a
+    resolution of one period. Works with asyncio and uvloop alike.
+    """
+
+    def __init__(self, config, telemetry):
+        self._config: Config = config
+        self._telemetry: Telemetry = telemetry
+        self._loop = asyncio.get_running_loop()
+        self._thread_id: int = threading.get_ident()
+        self._stats = LoopStats()
+        self._last_stats: LoopStatsState | None = None
+        self._profile_lock = asyncio.Lock()
+        self._heartbeat_handle: asyncio.TimerHandle | None = None
+        self._heartbeat_time: float = 0.0
+        # (heartbeat time, description) of the last blocked loop capture
+        self._blocked: tuple[float, str] | None = None
+        self._watchdog: threading.Thread | None = None
+        self._watchdog_stop = threading.Event()
+
+    def open(self):
+        threshold = self._config.loop_slow_callback_secs
+        if threshold is None:
+            return
+        _LOGGER.info("report callbacks slower than %.3f s", threshold)
+        self._heartbeat_time = time.monotonic()
+        self._heartbeat_handle = self._loop.call_later(
+            self._config.loop_watchdog_secs, self._heartbeat
+        )
+        self._watchdog = threading.Thread(
+            target=self._watch, name="loop_watchdog", daemon=True
+        )
+        self._watchdog.start()
+
+    def close(self):
+        if self._heartbeat_handle is not None:
+            self._heartbeat_handle.cancel()
+            self._heartbeat_handle = None
+        if self._watchdog is not None:
+            self._watchdog_stop.set()
+            self._watchdog.join()
+            self._watchdog = None
+
+    async def maintain(self):
+        interval = self._config.loop_lag_sample_secs
+        next_report = self._loop.time() + STATS_REPORT_SECS
+        while True:
+            expected = self._loop.time() + interval
+            await asyncio.sleep(interval)
+            now = self._loop.time()
+            lag = max(0.0, now - expected)
+            self._stats.add_lag(lag)
+            if lag > self._config.loop_lag_warning_secs:
+                _LOGGER.warning("event loop lag %.3f ms", 1e3 * lag)
+            if now >= next_report:
+                next_report = now + STATS_REPORT_SECS
+                self.report_stats()
+
+    def report_stats(self):
+        stats = self._stats.get_state()
+        self._stats.reset()
+        self._last_stats = stats
+        _LOGGER.debug("stats: %s", stats)
+
+        point = Point("loop")
+        if stats.lag_avg_ms is not None:
+            point.field("lag_avg_ms", stats.lag_avg_ms)
+        point.field("lag_max_ms", stats.lag_max_ms)
+        point.field("slow_callbacks", stats.slow_callbacks)
+        self._telemetry.report_point(point)
+
+    def get_stats(self) -> LoopStatsState:
+        # Last reporting period, or the current one before the first report
+        if self._last_stats is None:
+            return self._stats.get_state()
+        return self._last_stats
+
+    async def profile(
+        self, duration: float, interval: float
+    ) -> collections.Counter[str]:
+        """Samples stacks of the event loop thread for duration seconds."""
+        if duration > self._config.debug_profile_max_secs:
+            raise ValueError(
+                "Duration exceeds %.1f s" % (self._config.debug_profile_max_secs)
+            )
+        if self._profile_lock.locked():
+            raise RuntimeError("Profile already running")
+        async with self._profile_lock:
+            _LOGGER.info("profile %.1f s, interval %.4f s", duration, interval)
+            return await self._loop.run_in_executor(
+                None, sample_stacks, self._thread_id, duration, interval
+            )
+
+    def _heartbeat(self):
+        threshold = self._config.loop_slow_callback_secs
+        assert threshold is not None
+        period = self._config.loop_watchdog_secs
+        now = time.monotonic()
+        duration = now - self._heartbeat_time - period
+        if duration >= threshold:
+            blocked = self._blocked
+            name = "unknown"
+            if blocked is not None and blocked[0] == self._heartbeat_time:
+                name = blocked[1]
+            self._slow_callback(name, duration)
+        self._heartbeat_time = now
+        self._heartbeat_handle = self._loop.call_later(period, self._heartbeat)
+
+    def _watch(self):
+        # Watchdog thread, captures the loop stack while it is blocked
+        threshold = self._config.loop_slow_callback_secs
+        assert threshold is not None
+        period = self._config.loop_watchdog_secs
+        while True:
+            # Wake up when the pending heartbeat is late by the threshold,
+            # about once per period while the loop keeps up
+            heartbeat_time = self._heartbeat_time
+            wait = heartbeat_time + period + threshold - time.monotonic()
+            blocked = self._blocked
+            if blocked is not None and blocked[0] == heartbeat_time:
+                wait = max(wait, period)
+            if wait > 0:
+                if self._watchdog_stop.wait(wait):
+                    return
+                continue
+            try:
+                name = describe_blocked(self._loop, self._thread_id)
+            except Exception:
+                _LOGGER.exception("unable to capture blocked loop")
+                name = "unknown"
+            self._blocked = (heartbeat_time, name)
+
+    def _slow_callback(self, name: str, duration: float):
+        _LOGGER.warning("slow callback %.3f ms: %s", 1e3 * duration, name)
+        self._stats.add_slow_callback(name, duration)
@@ -0,0 +1,72 @@
+import math
+
+__all__ = [
+    "MotionProfile",
+]
+
+
+class MotionProfile:
+    """Time-optimal point-to-point move with limited speed and acceleration.
+
+    Supports trapezoidal velocity profile ("trapezoidal") and S-curve profile
+    ("scurve") with sinusoidal acceleration ramps (no steps in acceleration).
+    """
+
+    def __init__(
+        self,
+        start: float,
+        target: float,
+        max_speed: float,
+        max_accel: float,
+        kind: str = "trapezoidal",
+    ):
+        if max_speed <= 0.0 or max_accel <= 0.0:
+            raise ValueError("max_speed and max_accel must be positive")
+        if kind not in ("trapezoidal", "scurve"):
+            raise ValueError("unknown motion profile: %s" % (kind))
+
+        self.start: float = start
+        self.target: float = target
+        self._kind: str = kind
+        self._direction: float = 1.0 if target >= start else -1.0
+
+        distance = abs(target - start)
+        # Peak acceleration of S-curve ramp is pi/2 times the mean acceleration
+        accel = max_accel if kind == "trapezoidal" else max_accel / (0.5 * math.pi)
+        speed = max_speed
+        if speed**2 / accel > distance:
+            # Not enough room to reach max speed (triangular profile)
+            speed = math.sqrt(distance * accel)
+
+        self._speed: float = speed
+        self._accel_time: float = speed / accel if speed > 0.0 else 0.0
+        accel_dist = 0.5 * speed * self._accel_time
+        self._cruise_time: float = (
+            (distance - 2.0 * accel_dist) / speed if speed > 0.0 else 0.0
+        )
+        self.duration: float = 2.0 * self._accel_time + self._cruise_time
+
+    def pos(self, t: float) -> float:
+        """Position at time t (seconds since the start of the move)."""
+        if t <= 0.0:
+            return self.start
+        if t >= self.duration:
+            return self.target
+
+        ta, tc = self._accel_time, self._cruise_time
+        if t < ta:
+            dist = self._ramp_dist(t)
+        elif t < ta + tc:
+            dist = self._ramp_dist(ta) + self._speed * (t - ta)
+        else:
+            total = 2.0 * self._ramp_dist(ta) + self._speed * tc
+            dist = total - self._ramp_dist(self.duration - t)
+        return self.start + self._direction * dist
+
+    def _ramp_dist(self, t: float) -> float:
+        # Distance covered during acceleration ramp after time t
+        ta = self._accel_time
+        if self._kind == "trapezoidal":
+            return 0.5 * self._speed / ta * t**2
+        w = math.pi / ta
+        return 0.5 * self._speed * (t - math.sin(w * t) / w)
@@ -0,0 +1,126 @@
+import os
+import json
+import mmap
+import time
+import hashlib
+import logging
+import threading
+import pygame.mixer
+
+_LOGGER = logging.getLogger(__name__)
+
+__all__ = [
+    "PcmCache",
+    "decode_sound",
+]
+
+
+class PcmCache:
+    """Cache of decoded sounds as raw PCM in the mixer's sample format.
+
+    Cache files are keyed by the hash of the source file and the mixer
+    settings, so a changed source file or mixer format is decoded again.
+    Source hashes are remembered by file size and mtime to avoid re-reading
+    unchanged files. Methods are blocking (meant for worker thread).
+    """
+
+    def __init__(self, cache_dir: str):
+        self._cache_dir: str = cache_dir
+        self._index_file: str = os.path.join(cache_dir, "index.json")
+        self._index: dict[str, dict] = {}
+        self._lock = threading.Lock()
+
+        os.makedirs(cache_dir, exist_ok=True)
+        if os.path.isfile(self._index_file):
+            try:
+                with open(self._index_file, "r") as fin:
+                    self._index = json.load(fin)
+            except (OSError, ValueError):
+                _LOGGER.exception("unable to read cache index, ignoring")
+
+    def load(self, path: str) -> pygame.mixer.Sound:
+        with self._lock:
+            source_hash = self._source_hash(path)
+            cache_file = self._cache_file(source_hash)
+            if os.path.isfile(cache_file):
+                return self._load_cached(cache_file)
+
+            sound = decode_sound(path)
+            self._store(cache_file, sound)
+            return sound
+
+    def _load_cached(self, cache_file: str) -> pygame.mixer.Sound:
+        start_time = time.time()
+        with open(cache_file, "rb") as f:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+                sound = pygame.mixer.Sound(buffer=buf)
+        _LOGGER.info(
+            "load cached sound done in: %.3f s (%s)",
+            time.time() - start_time,
+            os.path.basename(cache_file),
+        )
+        return sound
+
+    def _store(self, cache_file: str, sound: pygame.mixer.Sound):
+        tmp_file = "%s.tmp" % (cache_file)
+        try:
+            with open(tmp_file, "wb") as fout:
+                fout.write(sound.get_raw())
+            os.replace(tmp_file, cache_file)
+        except OSError:
+            _LOGGER.exception("unable to write sound cache: %s", cache_file)
+
+    def _source_hash(self, path: str) -> str:
+        stat = os.stat(path)
+        entry = self._index.get(path)
+        if (
+            entry is not None
+            and entry["size"] == stat.st_size
+            and entry["mtime_ns"] == stat.st_mtime_ns
+        ):
+            return entry["hash"]
+
+        h = hashlib.sha1()
+        with open(path, "rb") as fin:
+            for chunk in iter(lambda: fin.read(1024**2), b""):
+                h.update(chunk)
+        source_hash = h.hexdigest()
+
+        # Drop cache file of the previous version of the source file
+        if entry is not None and entry["hash"] != source_hash:
+            old_cache_file = self._cache_file(entry["hash"])
+            if os.path.isfile(old_cache_file):
+                os.remove(old_cache_file)
+
+        self._index[path] = {
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+            "hash": source_hash,
+        }
+        self._save_index()
+        return source_hash
+
+    def _save_index(self):
+        tmp_file = "%s.tmp" % (self._index_file)
+        try:
+            with open(tmp_file, "w") as fout:
+                json.dump(self._index, fout)
+            os.replace(tmp_file, self._index_file)
+        except OSError:
+            _LOGGER.exception("unable to write cache index")
+
+    def _cache_file(self, source_hash: str) -> str:
+        frequency, size, channels = pygame.mixer.get_init()
+        sample_format = "%s%d" % ("s" if size < 0 else "u", abs(size))
+        return os.path.join(
+            self._cache_dir,
+            "%s-%d-%s-%d.pcm" % (source_hash, frequency, sample_format, channels),
+        )
+
+
+def decode_sound(path: str) -> pygame.mixer.Sound:
+    _LOGGER.info("decode sound: %s", path)
+    start_time = time.time()
+    sound = pygame.mixer.Sound(path)
+    _LOGGER.info("decode sound done in: %.3f s", time.time() - start_time)
+    return sound
@@ -0,0 +1,53 @@
+import logging
+import importlib.util
+from typing import Any
+from ._config import Config
+from ._logging import log_level
+
+_LOGGER = logging.getLogger(__name__)
+
+__all__ = [
+    "server_options",
+]
+
+
+def server_options(config: Config) -> dict[str, Any]:
+    """Keyword arguments of uvicorn.run for the configured server profile.
+
+    Always a single worker, all state lives in the process. Logging is set
+    up by setup_logging, uvicorn loggers propagate to the root logger.
+    """
+    options: dict[str, Any] = {
+        "host": config.server_host,
+        "port": config.server_port,
+        "log_config": None,
+        "log_level": log_level(config),
+    }
+    if config.server_profile == "development":
+        return options
+    if config.server_profile != "production":
+        raise ValueError("unknown server profile: %s" % (config.server_profile))
+
+    loop = "uvloop"
+    if importlib.util.find_spec("uvloop") is None:
+        _LOGGER.warning("uvloop not installed, using asyncio loop")
+        loop = "asyncio"
+    http = "httptools"
+    if importlib.util.find_spec("httptools") is None:
+        _LOGGER.warning("httptools not installed, using h11")
+        http = "h11"
+
+    options.update(
+        loop=loop,
+        http=http,
+        ws="websockets",
+        ws_ping_interval=config.server_ws_ping_secs,
+        ws_ping_timeout=config.server_ws_ping_timeout_secs,
+        ws_max_size=config.server_ws_max_size,
+        ws_max_queue=config.server_ws_max_queue,
+        # Small JSON updates on a local network, compression only costs CPU
+        ws_per_message_deflate=False,
+        timeout_keep_alive=config.server_keepalive_secs,
+        access_log=False,
+    )
+    return options
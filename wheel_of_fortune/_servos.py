@@ -1,8 +1,9 @@
 import asyncio
-import aiohttp
 import logging
 from typing import Callable
 from ._config import Config
+from ._motion import MotionProfile
+from ._wled import WledClient
 from .schemas import (
     ServoState,
     ServoStateIn,
@@ -16,19 +17,36 @@ _LOGGER = logging.getLogger(__name__)
 
 
 class ServoMotor:
-    def __init__(self, pwm_id, mount_angle, zero_duty, full_duty, mount_duty):
+    def __init__(
+        self,
+        pwm_id,
+        mount_angle,
+        zero_duty,
+        full_duty,
+        mount_duty,
+        max_speed,
+        max_accel,
+        motion_profile,
+    ):
         self.pwm_id = pwm_id
         self._mount_angle = mount_angle
         self._zero_duty = zero_duty
         self._full_duty = full_duty
         self._mount_duty = mount_duty
+        self._max_speed = max_speed
+        self._max_accel = max_accel
+        self._motion_profile = motion_profile
 
         self._pos = 0.0
         self._detached = True
+        self.last_active: float = 0.0
 
     def set_state(self, state: ServoStateIn):
         if state.pos is not None:
             self._pos = state.pos
+            if state.detached is None:
+                # Reattach before moving
+                self._detached = False
         if state.detached is not None:
             self._detached = state.detached
 
@@ -53,6 +71,22 @@ class ServoMotor:
             return 0.0
         return self._pos_to_duty(self._pos)
 
+    @property
+    def detached(self) -> bool:
+        return self._detached
+
+    def plan_move(self, target_pos: float) -> MotionProfile:
+        return MotionProfile(
+            self._pos,
+            target_pos,
+            self._max_speed,
+            self._max_accel,
+            kind=self._motion_profile,
+        )
+
+    def set_pos(self, pos: float):
+        self._pos = pos
+
     def _pos_to_duty(self, pos: float | None) -> float:
         if pos is None:
             return 0.0
@@ -64,15 +98,25 @@ class ServoMotor:
         return (duty - self._zero_duty) / (self._full_duty - self._zero_duty)
 
 
+class ServoMove:
+    def __init__(self, profile, start_time, future):
+        self.profile: MotionProfile = profile
+        self.start_time: float = start_time
+        self.done: asyncio.Future = future
+
+    def finish(self):
+        if not self.done.done():
+            self.done.set_result(None)
+
+
 class ServoController:
-    def __init__(self, config, update_cb):
+    def __init__(self, config, wled, update_cb):
         self._config: Config = config
+        self._wled: WledClient = wled
         self._update_cb: Callable[[ServosState], None] = update_cb
         self._loop = asyncio.get_running_loop()
-        self._session: aiohttp.ClientSession | None = None
-        self._info = {}
 
-        self._motors = {}
+        self._motors: dict[str, ServoMotor] = {}
         for i, servo_conf in enumerate(config.servos):
             pwm_id = "%d" % (i)
             self._motors[servo_conf.name] = ServoMotor(
@@ -81,30 +125,32 @@ class ServoController:
                 self._config.servo_zero_duty,
                 self._config.servo_full_duty,
                 self._config.servo_mount_duty,
+                servo_conf.max_speed,
+                servo_conf.max_accel,
+                servo_conf.motion_profile,
             )
 
+        # Active moves (by motor name), streamed to WLED by single task
+        self._moves: dict[str, ServoMove] = {}
+        self._stream_task: asyncio.Task | None = None
+
     async def open(self):
         _LOGGER.info("open")
-        self._session = aiohttp.ClientSession(
-            base_url=self._config.wled_url,  # type: ignore
-            raise_for_status=True,  # type: ignore
-        )
-        resp = await self._session.get("/json/info")
-        self._info = await resp.json()
-        _LOGGER.debug("info: %s" % (self._info))
 
     async def close(self):
-        if self._session is None:
-            return
-        _LOGGER.info("close")
-        await self._session.close()
-        _LOGGER.info("close done.")
+        if self._stream_task is not None:
+            self._stream_task.cancel()
+        for move in self._moves.values():
+            move.finish()
+        self._moves.clear()
 
     async def set_state(self, state: ServosStateIn):
-        _LOGGER.info("set_state: %s" % (state))
+        _LOGGER.info("set_state: %s", state)
         for name, motor in self._motors.items():
             if name in state.motors:
+                self._stop_move(name)
                 motor.set_state(state.motors[name])
+                motor.last_active = self._loop.time()
         await self._sync_state()
 
     def get_state(self) -> ServosState:
@@ -114,22 +160,22 @@ class ServoController:
 
     def get_info(self) -> ServosInfo:
         return ServosInfo(
-            version=self._info.get("ver", ""),
+            version=self._wled.get_info().get("ver", ""),
             motors={name: motor.get_info() for name, motor in self._motors.items()},
         )
 
     async def maintain(self):
         while True:
-            # state = self.get_state()
-            # _LOGGER.info("servos state: %s" % (state))
-            await asyncio.sleep(100.0)
+            try:
+                await self._detach_idle_motors()
+            except Exception:
+                _LOGGER.exception("error while detaching idle motors")
+            await asyncio.sleep(1.0)
 
     async def move_to_pos(
         self, target_pos: float, motor_names: list[str] | None = None
     ):
-        _LOGGER.info(
-            "move to pos: motors: %s, target: %.3f" % (motor_names, target_pos)
-        )
+        _LOGGER.info("move to pos: motors: %s, target: %.3f", motor_names, target_pos)
 
         if motor_names is None:
             selected_motors = self._motors
@@ -137,22 +183,98 @@ class ServoController:
             selected_motors = {}
             for name in motor_names:
                 if name not in self._motors:
-                    _LOGGER.warning("unknown servo name: %s" % (name))
+                    _LOGGER.warning("unknown servo name: %s", name)
                     continue
                 selected_motors[name] = self._motors[name]
 
+        start_time = self._loop.time()
+        moves: dict[str, ServoMove] = {}
         for name, motor in selected_motors.items():
-            motor.set_state(ServoStateIn(pos=target_pos, detached=False))
+            self._stop_move(name)
+            motor.set_state(ServoStateIn(detached=False))
+            move = ServoMove(
+                motor.plan_move(target_pos), start_time, self._loop.create_future()
+            )
+            self._moves[name] = move
+            moves[name] = move
+
+        if len(moves) == 0:
+            return
+
+        if self._stream_task is None or self._stream_task.done():
+            self._stream_task = asyncio.create_task(self._stream_moves())
+
+        try:
+            await asyncio.wait([move.done for move in moves.values()])
+        except asyncio.CancelledError:
+            # Stop motors at their current position
+            for name, move in moves.items():
+                if self._moves.get(name) is move:
+                    self._stop_move(name)
+            raise
+        for move in moves.values():
+            move.done.result()
+
+    async def _detach_idle_motors(self):
+        timeout = self._config.servo_detach_timeout
+        if timeout < 0.0:
+            return
+
+        now = self._loop.time()
+        idle_motors = [
+            name
+            for name, motor in self._motors.items()
+            if not motor.detached
+            and name not in self._moves
+            and now - motor.last_active >= timeout
+        ]
+        if len(idle_motors) == 0:
+            return
+
+        _LOGGER.info("detach idle motors: %s", idle_motors)
+        for name in idle_motors:
+            self._motors[name].set_state(ServoStateIn(detached=True))
         await self._sync_state()
 
-    async def _sync_state(self):
-        _LOGGER.info("sync state")
-        if self._session is None:
-            raise ConnectionError("Session is not opened")
+    def _stop_move(self, name: str):
+        move = self._moves.pop(name, None)
+        if move is not None:
+            move.finish()
+
+    async def _stream_moves(self):
+        # Samples all active trajectories at fixed rate, one request per tick
+        period = 1.0 / self._config.servo_update_rate
+        next_time = self._loop.time()
+        try:
+            while len(self._moves) > 0:
+                now = self._loop.time()
+                finished = []
+                for name, move in self._moves.items():
+                    t = now - move.start_time
+                    self._motors[name].set_pos(move.profile.pos(t))
+                    self._motors[name].last_active = now
+                    if t >= move.profile.duration:
+                        finished.append((name, move))
 
+                await self._sync_state()
+                for name, move in finished:
+                    if self._moves.get(name) is move:
+                        self._stop_move(name)
+
+                next_time = max(next_time + period, self._loop.time())
+                await asyncio.sleep(next_time - self._loop.time())
+        except Exception as e:
+            _LOGGER.exception("error while streaming servo moves")
+            for move in self._moves.values():
+                if not move.done.done():
+                    move.done.set_exception(e)
+            self._moves.clear()
+
+    async def _sync_state(self):
+        _LOGGER.debug("sync state")
         pwm_data = {}
         for motor in self._motors.values():
             pwm_data[motor.pwm_id] = {"duty": motor.get_duty()}
 
-        await self._session.post("/json/state", json={"pwm": pwm_data})
+        await self._wled.update_state({"pwm": pwm_data})
         self._loop.call_soon(self._update_cb, self.get_state())
@@ -13,56 +13,142 @@ __all__ = [
     "SettingsManager",
 ]
 
+# Reserved key of the settings file, generation of the last full save
+SAVE_GENERATION_KEY = "_save_generation"
+
 
 class SettingsManager:
-    def __init__(self, filename):
+    """Loads and persists settings (JSON file).
+
+    Changes are saved after no further change for debounce_secs (at most
+    max_delay_secs after the first change). Files are replaced atomically
+    (temp file, fsync, rename). With journal enabled, changes are appended
+    to a journal file instead, which is compacted into the settings file
+    once it holds journal_max_ops operations. Every full save increments
+    the save generation stored in the file, journal entries are tagged with
+    it. Entries of a journal not removed after a full save (power loss) are
+    older than the file and not replayed.
+    """
+
+    def __init__(
+        self,
+        filename,
+        debounce_secs=2.0,
+        max_delay_secs=10.0,
+        journal=False,
+        journal_max_ops=200,
+    ):
         self._filename: str = filename
+        self._journal_filename: str = "%s.journal" % (filename)
+        self._debounce_secs: float = debounce_secs
+        self._max_delay_secs: float = max_delay_secs
+        self._journal: bool = journal
+        self._journal_max_ops: int = journal_max_ops
         self._data: dict[str, Any] | None = None
         self._saved: bool = True
+        # Changed values by key path since last save (None: full save needed)
+        self._pending_ops: dict[tuple, Any] | None = {}
+        self._journal_ops: int = 0
+        self._generation: int = 0  # Incremented when data is (re)loaded
+        self._save_generation: int = 0  # Incremented by every full save
+        self._changed = asyncio.Event()
         self._lock = asyncio.Lock()
 
     async def open(self):
         async with self._lock:
-            _LOGGER.info("Open settings (%s)" % (self._filename))
-
-            if not os.path.isfile(self._filename):
+            _LOGGER.info("Open settings (%s)", self._filename)
+            self._data = await self._read_file(self._filename)
+            if self._data is None:
+                # Left by previous versions, which replaced the file in place
+                self._data = await self._read_file("%s.backup" % (self._filename))
+            if self._data is None:
                 _LOGGER.warning(
                     "Settings file not found, using empty settings: %s", self._filename
                 )
                 self._data = {}
-                self._saved = True
-                return
-
-            async with aiofiles.open(self._filename, mode="r") as f:
-                contents = await f.read()
-            self._data = json.loads(contents)
+            self._save_generation = self._data.pop(SAVE_GENERATION_KEY, 0)
+            self._journal_ops = await self._replay_journal()
+            self._generation += 1
             self._saved = True
+            self._pending_ops = {}
 
     async def close(self):
-        await self.save()
+        await self.save(compact=True)
 
-    async def save(self):
+    async def save(self, compact=False):
         async with self._lock:
             if self._data is None:
                 return
-            if self._saved:
+            if self._saved and not (compact and self._journal_ops > 0):
                 return
-            _LOGGER.info("Save settings (%s)" % (self._filename))
-            os.replace(self._filename, "%s.backup" % (self._filename))
-            async with aiofiles.open(self._filename, mode="w") as f:
-                await f.write(json.dumps(self._data, indent=4, ensure_ascii=False))
+            ops, self._pending_ops = self._pending_ops, {}
             self._saved = True
 
+            loop = asyncio.get_running_loop()
+            if (
+                self._journal
+                and not compact
+                and ops is not None
+                and self._journal_ops + len(ops) < self._journal_max_ops
+            ):
+                _LOGGER.debug("Append %d settings changes to journal", len(ops))
+                await loop.run_in_executor(
+                    None,
+                    append_journal,
+                    self._journal_filename,
+                    ops,
+                    self._save_generation,
+                )
+                self._journal_ops += len(ops)
+                return
+
+            _LOGGER.info("Save settings (%s)", self._filename)
+            save_generation = self._save_generation + 1
+            contents = json.dumps(
+                {**self._data, SAVE_GENERATION_KEY: save_generation},
+                indent=4,
+                ensure_ascii=False,
+            )
+            await loop.run_in_executor(
+                None, write_file_atomic, self._filename, contents
+            )
+            self._save_generation = save_generation
+            if os.path.exists(self._journal_filename):
+                await loop.run_in_executor(None, os.remove, self._journal_filename)
+            self._journal_ops = 0
+
     async def maintain(self):
+        loop = asyncio.get_running_loop()
         while True:
+            await self._changed.wait()
+            deadline = loop.time() + self._max_delay_secs
+            # Wait until there are no changes for a while
+            while True:
+                self._changed.clear()
+                timeout = min(self._debounce_secs, deadline - loop.time())
+                if timeout <= 0.0:
+                    break
+                try:
+                    await asyncio.wait_for(self._changed.wait(), timeout)
+                except asyncio.TimeoutError:
+                    break
             await self.save()
-            await asyncio.sleep(10.0)
+
+    def record(self, key_path: list, value: Any):
+        if self._pending_ops is not None:
+            # Only the last value of a key is journaled (e.g. volume slider)
+            self._pending_ops[tuple(key_path)] = value
+        self._saved = False
+        self._changed.set()
 
     def subsettings(self, name):
         return Settings(self, base_key=[name])
 
     def invalidate(self):
+        # Data changed in place, journal can not express it
+        self._pending_ops = None
         self._saved = False
+        self._changed.set()
 
     def __getitem__(self, key):
         return self.subsettings(key)
@@ -73,11 +159,92 @@ class SettingsManager:
             raise ValueError("Settings used before open()")
         return self._data
 
+    @property
+    def generation(self) -> int:
+        return self._generation
+
+    async def _read_file(self, filename: str) -> dict[str, Any] | None:
+        if not os.path.isfile(filename):
+            return None
+        try:
+            async with aiofiles.open(filename, mode="r") as f:
+                contents = await f.read()
+            return json.loads(contents)
+        except (OSError, ValueError):
+            _LOGGER.exception("Unable to read settings file: %s", filename)
+            return None
+
+    async def _replay_journal(self) -> int:
+        if not os.path.isfile(self._journal_filename):
+            return 0
+        async with aiofiles.open(self._journal_filename, mode="r") as f:
+            lines = await f.readlines()
+
+        count = 0
+        stale = 0
+        for line in lines:
+            try:
+                op = json.loads(line)
+            except ValueError:
+                # Torn write of the last operation (power loss)
+                _LOGGER.warning("Invalid settings journal entry, skip: %r", line)
+                continue
+            if op.get("generation", 0) < self._save_generation:
+                # Already in the settings file, journal was not removed
+                stale += 1
+                continue
+            *path, key = op["key"]
+            data = self._data
+            for k in path:
+                data = data.setdefault(k, {})
+            data[key] = op["value"]
+            count += 1
+        if stale > 0:
+            _LOGGER.warning("Skipped %d stale settings journal entries", stale)
+        _LOGGER.info("Replayed %d settings changes from journal", count)
+        return count
+
+
+def write_file_atomic(filename: str, contents: str):
+    tmp_filename = "%s.tmp" % (filename)
+    with open(tmp_filename, "w") as f:
+        f.write(contents)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_filename, filename)
+    fsync_dir(os.path.dirname(os.path.abspath(filename)))
+
+
+def append_journal(filename: str, ops: dict[tuple, Any], generation: int):
+    with open(filename, "a") as f:
+        for key_path, value in ops.items():
+            op = {"generation": generation, "key": list(key_path), "value": value}
+            f.write(json.dumps(op, ensure_ascii=False) + "\n")
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def fsync_dir(path: str):
+    # Make the rename durable
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
 
 class Settings:
+    """View of settings subtree at base_key.
+
+    The resolved subtree dict is cached until settings are reloaded.
+    """
+
     def __init__(self, manager, base_key=[]):
         self._manager: SettingsManager = manager
         self._base_key = base_key
+        self._path: str = "/".join(["%s" % (k) for k in base_key])
+        self._node: dict[str, Any] | None = None
+        self._node_generation: int = -1
 
     def __contains__(self, key):
         return key in self.data
@@ -92,12 +259,18 @@ class Settings:
         return self.data.get(key, default)
 
     def set(self, key, value):
-        _LOGGER.info(
-            "Set setting (%s): %s = %s"
-            % ("/".join(["%s" % (k) for k in self._base_key]), key, value)
-        )
+        _LOGGER.info("Set setting (%s): %s = %s", self._path, key, value)
         self.data[key] = value
-        self._manager.invalidate()
+        self._manager.record(self._base_key + [key], value)
+
+    def update(self, values: dict[str, Any]):
+        """Sets multiple keys at once."""
+        if len(values) == 0:
+            return
+        _LOGGER.info("Set settings (%s): %s", self._path, values)
+        self.data.update(values)
+        for key, value in values.items():
+            self._manager.record(self._base_key + [key], value)
 
     def subsettings(self, name):
         return Settings(self._manager, base_key=self._base_key + [name])
@@ -107,9 +280,15 @@ class Settings:
 
     @property
     def data(self):
+        generation = self._manager.generation
+        if self._node is not None and self._node_generation == generation:
+            return self._node
+
         res = self._manager.data
         for k in self._base_key:
             if k not in res:
                 res[k] = {}
             res = res[k]
+        self._node = res
+        self._node_generation = generation
         return res
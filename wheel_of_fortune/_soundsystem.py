@@ -1,15 +1,23 @@
 import os
+import wave
 import asyncio
 import logging
+import functools
 import pygame.mixer
 import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from typing import Callable
 from ._config import Config
 from ._settings import Settings
+from ._pcm_cache import PcmCache, decode_sound
+from ._envelope import Envelope, EnvelopeEngine, EnvelopeHandle, VolumeControl
+from ._telemetry import Telemetry, Point
 from .schemas import (
     SoundChannelState,
     SoundChannelStateIn,
     SoundInfo,
+    SoundStatsState,
     SoundSystemState,
     SoundSystemStateIn,
     SoundSystemInfo,
@@ -26,95 +34,363 @@ __all__ = [
 MAIN_CH = "main"
 EFFECT_CH = "effect"
 
+STATS_SAMPLE_SECS = 0.5
+STATS_REPORT_SECS = 10.0
+
+
+class Voice:
+    def __init__(self, channel):
+        self.channel: pygame.mixer.Channel = channel
+        self.group: str | None = None
+        self.priority: int = 0
+        self.start_time: float = 0.0
+
+    @property
+    def busy(self) -> bool:
+        return self.channel.get_busy()
+
+
+class VoicePool:
+    """Fixed set of mixer channels, allocated to sound groups on play.
+
+    A group at its voice limit reuses its own oldest voice. Otherwise a free
+    voice is used, or the oldest voice of the lowest priority group (not
+    above the requested priority) is stolen.
+    """
+
+    def __init__(self, num_voices: int):
+        self._num_voices: int = num_voices
+        self._voices: list[Voice] = []  # Created by open()
+
+    def open(self):
+        # Needs initialized mixer
+        self._voices = [Voice(pygame.mixer.Channel(i)) for i in range(self._num_voices)]
+
+    def __len__(self) -> int:
+        return len(self._voices)
+
+    def used(self) -> int:
+        return sum(1 for v in self._voices if v.busy)
+
+    def group_voices(self, group: str) -> list[Voice]:
+        return [v for v in self._voices if v.group == group and v.busy]
+
+    def allocate(self, group: str, priority: int, max_voices: int) -> Voice | None:
+        own = self.group_voices(group)
+        if len(own) > 0 and len(own) >= max_voices:
+            voice = min(own, key=lambda v: v.start_time)
+        else:
+            free = [v for v in self._voices if not v.busy]
+            if len(free) > 0:
+                voice = free[0]
+            else:
+                candidates = [v for v in self._voices if v.priority <= priority]
+                if len(candidates) == 0:
+                    return None
+                voice = min(candidates, key=lambda v: (v.priority, v.start_time))
+
+        if voice.busy:
+            _LOGGER.debug("steal voice from group: %s", voice.group)
+            voice.channel.stop()
+        voice.group = group
+        voice.priority = priority
+        voice.start_time = time.monotonic()
+        return voice
+
 
 class SoundChannel:
-    def __init__(self, channel, sounds, settings):
-        self._channel: pygame.mixer.Channel = channel
-        self._sounds: dict[str, pygame.mixer.Sound] = sounds
+    """Group of sounds fully decoded into memory (effect clips, UI clicks).
+
+    Sounds of the group can overlap, each one plays on a voice from the pool.
+    """
+
+    def __init__(
+        self, name, voices, sounds, settings, envelopes, priority=0, max_voices=1
+    ):
+        self._name: str = name
+        self._voices: VoicePool = voices
+        self._sounds: SoundLibrary = sounds
         self._settings: Settings = settings
+        self._priority: int = priority
+        self._max_voices: int = max_voices
+        self._volume_control: VolumeControl = envelopes.create_control(self._set_volume)
 
         self._volume: float = 0.5
+        self._gain: float = 0.5  # Volume including envelopes
         self._sound_name: str | None = None
 
     def open(self):
         if "volume" in self._settings:
             self._volume = self._settings["volume"]
-        self._channel.set_volume(self._volume)
+        self._volume_control.set_base_volume(self._volume)
 
     async def set_state(self, state: SoundChannelStateIn):
         if state.volume is not None:
             self._volume = state.volume
-            self._channel.set_volume(self._volume)
+            self._volume_control.set_base_volume(self._volume)
             self._settings["volume"] = self._volume
 
         if state.sound_name is not None:
-            self.play(state.sound_name)
+            await self.play(state.sound_name)
 
     def get_state(self) -> SoundChannelState:
         return SoundChannelState(
             volume=self._volume,
             sound_name=self._sound_name,
+            voices=self.num_voices(),
         )
 
-    def play(self, sound_name: str, fade_ms: int = 300):
+    async def play(self, sound_name: str, fade_ms: int = 300):
         if sound_name not in self._sounds:
             raise ValueError("Sound not found: %s" % (sound_name))
-        sound = self._sounds[sound_name]
-        self._channel.set_volume(self._volume)
-        self._channel.play(sound, fade_ms=fade_ms)
+        sound = await self._sounds.load(sound_name)
+        self._volume_control.reset()
+        voice = self._voices.allocate(self._name, self._priority, self._max_voices)
+        if voice is None:
+            _LOGGER.warning("no free voice, skip sound: %s", sound_name)
+            return
+        voice.channel.set_volume(self._gain)
+        voice.channel.play(sound, fade_ms=fade_ms)
         self._sound_name = sound_name
 
+    def num_voices(self) -> int:
+        return len(self._voices.group_voices(self._name))
+
+    def prefetch(self, sound_names: list[str]):
+        self._sounds.prefetch(sound_names)
+
     def fadeout(self, fade_ms: int = 300):
-        self._channel.fadeout(fade_ms)
+        for voice in self._voices.group_voices(self._name):
+            voice.channel.fadeout(fade_ms)
         self._sound_name = None
 
     async def volume_sweep(
-        self, volume_from: float, volume_to: float, time_ms: int = 300
+        self,
+        volume_from: float,
+        volume_to: float,
+        time_ms: int = 300,
+        curve: str = "linear",
     ):
-        steps: int = min(time_ms // 50, 100)
-        delta = (volume_to - volume_from) / steps
-        for i in range(steps):
-            volume = volume_from + (i + 1) * delta
-            self._channel.set_volume(self._volume * volume)
-            await asyncio.sleep(1e-3 * time_ms / steps)
+        envelope = Envelope([(0.0, volume_from), (1e-3 * time_ms, volume_to)], curve)
+        await self.apply_envelope(envelope)
+
+    async def apply_envelope(self, envelope: Envelope):
+        # Gain is applied on top of channel volume until the next play
+        handle: EnvelopeHandle = self._volume_control.start(envelope)
+        try:
+            await handle.wait()
+        except asyncio.CancelledError:
+            handle.cancel()
+            raise
+
+    def _set_volume(self, volume: float):
+        self._gain = volume
+        for voice in self._voices.group_voices(self._name):
+            voice.channel.set_volume(volume)
+
+
+class MusicChannel(SoundChannel):
+    """Streams long tracks from disk via pygame.mixer.music.
+
+    Only a small decoding buffer is kept in memory. There is only one music
+    stream in pygame, so there can be only one MusicChannel.
+    """
+
+    def __init__(self, sounds, settings, envelopes):
+        SoundChannel.__init__(self, MAIN_CH, None, sounds, settings, envelopes)
+        self._loop = asyncio.get_running_loop()
+        # Music commands run in order on one thread, opening a file may block
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="music")
+        # Incremented by every command, a stale play is skipped
+        self._generation: int = 0
+        # Volume writes are queued to the music thread, at most one at a time
+        self._volume_queued: bool = False
+
+    async def play(self, sound_name: str, fade_ms: int = 300):
+        if sound_name not in self._sounds:
+            raise ValueError("Sound not found: %s" % (sound_name))
+        path = self._sounds.get_file(sound_name).path
+        self._volume_control.reset()
+        self._generation += 1
+        await self._loop.run_in_executor(
+            self._executor, self._play_music, self._generation, path, fade_ms
+        )
+        self._sound_name = sound_name
+
+    def fadeout(self, fade_ms: int = 300):
+        # Queued after a pending play, which is then skipped
+        self._generation += 1
+        future = self._loop.run_in_executor(
+            self._executor, pygame.mixer.music.fadeout, fade_ms
+        )
+        future.add_done_callback(_log_future_error)
+        self._sound_name = None
+
+    async def close(self):
+        await self._loop.run_in_executor(
+            None, functools.partial(self._executor.shutdown, cancel_futures=True)
+        )
+
+    def _play_music(self, generation: int, path: str, fade_ms: int):
+        if generation != self._generation:
+            _LOGGER.debug("skip stale music play: %s", path)
+            return
+        play_music(path, fade_ms)
+
+    def num_voices(self) -> int:
+        if not pygame.mixer.get_init():
+            return 0
+        return 1 if pygame.mixer.music.get_busy() else 0
+
+    def prefetch(self, sound_names: list[str]):
+        # Nothing to decode, but ask the OS to read the files into page cache
+        for name in sound_names:
+            if name in self._sounds:
+                path = self._sounds.get_file(name).path
+                future = self._loop.run_in_executor(None, advise_willneed, path)
+                future.add_done_callback(_log_future_error)
+
+    def _set_volume(self, volume: float):
+        # Called from the envelope engine thread, pygame.mixer.music is only
+        # driven from the music thread. Queued writes take the latest gain.
+        self._gain = volume
+        if self._volume_queued:
+            return
+        self._volume_queued = True
+        try:
+            self._executor.submit(self._apply_volume)
+        except RuntimeError:
+            # Executor shut down on close
+            self._volume_queued = False
+
+    def _apply_volume(self):
+        self._volume_queued = False
+        pygame.mixer.music.set_volume(self._gain)
+
+
+class SoundStats:
+    """Play latency and mixer load statistics of one reporting period."""
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.plays: int = 0
+        self.play_latency_sum: float = 0.0
+        self.play_latency_max: float = 0.0
+        self.busy_samples: int = 0
+        self.busy_voices_sum: int = 0
+        self.busy_voices_max: int = 0
+        self.stalls: int = 0
+        self.stall_max: float = 0.0
+
+    def add_play(self, latency: float):
+        self.plays += 1
+        self.play_latency_sum += latency
+        self.play_latency_max = max(self.play_latency_max, latency)
+
+    def add_busy_sample(self, voices: int):
+        self.busy_samples += 1
+        self.busy_voices_sum += voices
+        self.busy_voices_max = max(self.busy_voices_max, voices)
+
+    def add_stall(self, lag: float):
+        self.stalls += 1
+        self.stall_max = max(self.stall_max, lag)
+
+    def get_state(self, output_latency: float) -> SoundStatsState:
+        return SoundStatsState(
+            plays=self.plays,
+            play_latency_avg_ms=(
+                1e3 * self.play_latency_sum / self.plays if self.plays > 0 else None
+            ),
+            play_latency_max_ms=(
+                1e3 * self.play_latency_max if self.plays > 0 else None
+            ),
+            busy_voices_avg=(
+                self.busy_voices_sum / self.busy_samples
+                if self.busy_samples > 0
+                else None
+            ),
+            busy_voices_max=self.busy_voices_max,
+            stalls=self.stalls,
+            stall_max_ms=1e3 * self.stall_max,
+            output_latency_ms=1e3 * output_latency,
+        )
 
 
 class SoundSystem:
-    def __init__(self, config, settings, update_cb):
+    def __init__(self, config, settings, telemetry, update_cb):
         self._config: Config = config
         self._settings: Settings = settings
+        self._telemetry: Telemetry = telemetry
         self._update_cb: Callable[[SoundSystemState], None] = update_cb
         self._loop = asyncio.get_running_loop()
+        self._stats = SoundStats()
+        self._last_stats: SoundStatsState | None = None
 
-        # Init
-        pygame.mixer.init()
-        pygame.mixer.set_num_channels(4)
-        pygame.mixer.set_reserved(2)
+        # Mixer is initialized by open()
+        self._voices = VoicePool(self._config.sound_voices)
 
-        self._sounds = load_sounds(os.path.join(self._config.data_dir, "sounds"))
-        self._channels: dict[str, SoundChannel] = {
-            name: SoundChannel(
-                pygame.mixer.Channel(i),
+        cache_dir = self._config.sound_cache_dir
+        if cache_dir is None:
+            cache_dir = os.path.join(self._config.data_dir, "cache", "sounds")
+        self._sounds = SoundLibrary(
+            os.path.join(self._config.data_dir, "sounds"),
+            int(self._config.sound_cache_mb * 1024**2),
+            PcmCache(cache_dir),
+        )
+        self._envelopes = EnvelopeEngine()
+        self._music = MusicChannel(
+            self._sounds, settings.subsettings(MAIN_CH), self._envelopes
+        )
+        self._channels: dict[str, SoundChannel] = {MAIN_CH: self._music}
+        for group in self._config.sound_groups:
+            self._channels[group.name] = SoundChannel(
+                group.name,
+                self._voices,
                 self._sounds,
-                settings.subsettings(name),
+                settings.subsettings(group.name),
+                self._envelopes,
+                priority=group.priority,
+                max_voices=group.max_voices,
             )
-            for i, name in enumerate([MAIN_CH, EFFECT_CH])
-        }
+        if EFFECT_CH not in self._channels:
+            raise ValueError("sound group '%s' is not configured" % (EFFECT_CH))
 
     async def open(self):
         _LOGGER.info("open")
+        # Mixer init and indexing sound files block, keep the loop responsive
+        await self._loop.run_in_executor(None, self._open_mixer)
         for ch in self._channels.values():
             ch.open()
+        self._envelopes.start()
 
     async def close(self):
         _LOGGER.info("close")
+        self._envelopes.stop()
+        await self._music.close()
+        self._sounds.close()
         pygame.mixer.quit()
 
+    def _open_mixer(self):
+        start_time = time.time()
+        # All channels are reserved for the voice pool
+        pygame.mixer.init(
+            frequency=self._config.sound_mixer_frequency,
+            buffer=self._config.sound_mixer_buffer,
+        )
+        pygame.mixer.set_num_channels(self._config.sound_voices)
+        pygame.mixer.set_reserved(self._config.sound_voices)
+        self._voices.open()
+        _LOGGER.info("mixer init done in: %.3f s", time.time() - start_time)
+        self._sounds.scan()
+
     async def set_state(self, state: SoundSystemStateIn):
-        _LOGGER.info("set state: %s" % (state))
+        _LOGGER.info("set state: %s", state)
         for name, ch_state in state.channels.items():
             if name not in self._channels:
-                _LOGGER.warning("unknown sound channel: %s" % (name))
+                _LOGGER.warning("unknown sound channel: %s", name)
                 continue
             await self._channels[name].set_state(ch_state)
         self._loop.call_soon(self._update_cb, self.get_state())
@@ -122,33 +398,95 @@ class SoundSystem:
     def get_state(self) -> SoundSystemState:
         return SoundSystemState(
             channels={name: ch.get_state() for name, ch in self._channels.items()},
+            voices_used=self._voices.used(),
+            voices_total=len(self._voices),
+            stats=self._last_stats,
         )
 
     def get_info(self) -> SoundSystemInfo:
         sounds_state: dict[str, SoundInfo] = {}
-        for name, sound in self._sounds.items():
+        for name, sound_file in self._sounds.items():
             sounds_state[name] = SoundInfo(
-                duration_secs=sound.get_length(),
+                duration_secs=sound_file.duration,
             )
         return SoundSystemInfo(
             sounds=sounds_state,
         )
 
+    def pin_sounds(self, sound_names: list[str]):
+        self._sounds.pin(sound_names)
+
+    def prefetch_sounds(self, channel: str, sound_names: list[str]):
+        self._channels[channel].prefetch(sound_names)
+
+    async def reload_sounds(self, paths: set[str]) -> dict[str, SoundInfo | None]:
+        """Reindexes changed sound files, returns changed sounds (None: removed)."""
+        names = self._sounds.find_names(paths)
+        if len(names) == 0:
+            return {}
+        _LOGGER.info("reload sounds: %s", sorted(names))
+        sound_files = await self._sounds.reindex(names)
+        return {
+            name: None if f is None else SoundInfo(duration_secs=f.duration)
+            for name, f in sound_files.items()
+        }
+
     async def maintain(self):
+        next_report = self._loop.time() + STATS_REPORT_SECS
+        music_sample = None
         while True:
-            # _LOGGER.debug("busy: %d, channels: %d" % (
-            #     pygame.mixer.get_busy(),
-            #     pygame.mixer.get_num_channels()
-            # ))
-            await asyncio.sleep(2.0)
+            await asyncio.sleep(STATS_SAMPLE_SECS)
+            self._stats.add_busy_sample(self._voices.used())
+            music_sample = self._check_music_stall(music_sample)
+            if self._loop.time() >= next_report:
+                next_report = self._loop.time() + STATS_REPORT_SECS
+                self.report_stats()
+
+    def _check_music_stall(self, prev_sample):
+        # Music position counts mixed samples, so it falls behind wall clock
+        # when the mixer thread does not get to run in time (underrun)
+        now = time.monotonic()
+        pos = pygame.mixer.music.get_pos() if pygame.mixer.music.get_busy() else -1
+        if prev_sample is not None and pos >= 0 and pos >= prev_sample[1] >= 0:
+            lag = (now - prev_sample[0]) - 1e-3 * (pos - prev_sample[1])
+            # Allow for buffering and millisecond resolution of position
+            if lag > 2.0 * self._output_latency() + 0.02:
+                _LOGGER.warning("mixer stalled for %.3f s", lag)
+                self._stats.add_stall(lag)
+        return (now, pos)
+
+    def _output_latency(self) -> float:
+        frequency, _, _ = pygame.mixer.get_init()
+        return self._config.sound_mixer_buffer / frequency
+
+    def report_stats(self):
+        stats = self._stats.get_state(self._output_latency())
+        self._stats.reset()
+        self._last_stats = stats
+        _LOGGER.debug("stats: %s", stats)
+
+        point = Point("sound")
+        point.field("plays", stats.plays)
+        if stats.play_latency_avg_ms is not None:
+            point.field("play_latency_avg_ms", stats.play_latency_avg_ms)
+            point.field("play_latency_max_ms", stats.play_latency_max_ms)
+        if stats.busy_voices_avg is not None:
+            point.field("busy_voices_avg", stats.busy_voices_avg)
+        point.field("busy_voices_max", stats.busy_voices_max)
+        point.field("stalls", stats.stalls)
+        point.field("stall_max_ms", stats.stall_max_ms)
+        self._telemetry.report_point(point)
+        self._loop.call_soon(self._update_cb, self.get_state())
 
     async def play(self, channel: str, sound_name: str, **kwargs):
-        _LOGGER.info("play (%s): %s, %s" % (channel, sound_name, kwargs))
-        self._channels[channel].play(sound_name, **kwargs)
+        _LOGGER.info("play (%s): %s, %s", channel, sound_name, kwargs)
+        start_time = time.perf_counter()
+        await self._channels[channel].play(sound_name, **kwargs)
+        self._stats.add_play(time.perf_counter() - start_time)
         self._loop.call_soon(self._update_cb, self.get_state())
 
     async def fadeout(self, channel: str, **kwargs):
-        _LOGGER.info("fadeout (%s): %s" % (channel, kwargs))
+        _LOGGER.info("fadeout (%s): %s", channel, kwargs)
         self._channels[channel].fadeout(**kwargs)
         self._loop.call_soon(self._update_cb, self.get_state())
 
@@ -156,25 +494,262 @@ class SoundSystem:
         self, channel: str, volume_from: float, volume_to: float, **kwargs
     ):
         _LOGGER.info(
-            "volume sweep (%s): %.2f -> %.2f (%s)"
-            % (channel, volume_from, volume_to, kwargs)
+            "volume sweep (%s): %.2f -> %.2f (%s)",
+            channel,
+            volume_from,
+            volume_to,
+            kwargs,
         )
         await self._channels[channel].volume_sweep(volume_from, volume_to, **kwargs)
 
+    async def volume_envelope(
+        self, channel: str, keyframes: list[tuple[float, float]], curve: str = "linear"
+    ):
+        _LOGGER.info("volume envelope (%s): %s, %s", channel, keyframes, curve)
+        await self._channels[channel].apply_envelope(Envelope(keyframes, curve))
+
+
+class SoundFile:
+    def __init__(self, path, duration, size):
+        self.path: str = path
+        self.duration: float = duration
+        self.size: int = size  # bytes on disk
+
+
+class SoundLibrary:
+    """Index of sound files, decoded lazily into memory bounded LRU cache.
+
+    Files are indexed by scan() (blocking, reads headers only). Decoding is
+    done in a worker thread, so that loading (or prefetching) a sound does
+    not block the event loop.
+    """
+
+    def __init__(
+        self,
+        sounds_dir: str,
+        cache_size: int,
+        pcm_cache: PcmCache | None = None,
+        suffixes: tuple[str, ...] = (".wav", ".ogg"),
+    ):
+        self._loop = asyncio.get_running_loop()
+        self._executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="sound_loader"
+        )
+        self._loading: dict[str, asyncio.Task] = {}
+        self._pcm_cache: PcmCache | None = pcm_cache
+        self._sounds_dir: str = sounds_dir
+        self._cache_size: int = cache_size
+        self._suffixes: tuple[str, ...] = suffixes
+
+        self._files: dict[str, SoundFile] = {}
+        # name -> (decoded sound, decoded size in bytes)
+        self._cache: OrderedDict[str, tuple[pygame.mixer.Sound, int]] = OrderedDict()
+        self._cache_usage: int = 0
+        self._pinned: set[str] = set()
+
+    def scan(self):
+        _LOGGER.info("index sounds... (dir: %s)", self._sounds_dir)
+        start_time = time.time()
+
+        files = {}
+        for fname in sorted(os.listdir(self._sounds_dir)):
+            if fname.startswith("."):
+                continue
+            name, suffix = os.path.splitext(fname)
+            if suffix not in self._suffixes:
+                _LOGGER.warning("unknown sound file: %s", fname)
+                continue
+            if name in files:
+                _LOGGER.warning("duplicate sound name, skip: %s", fname)
+                continue
+            path = os.path.join(self._sounds_dir, fname)
+            try:
+                files[name] = SoundFile(
+                    path, read_sound_duration(path), os.path.getsize(path)
+                )
+            except (OSError, EOFError, ValueError, wave.Error):
+                _LOGGER.exception("unable to read sound file header: %s", fname)
+        self._files = files
+        _LOGGER.info(
+            "index sounds done in: %.3f s (%d sounds)",
+            time.time() - start_time,
+            len(files),
+        )
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._files
+
+    def items(self):
+        return self._files.items()
+
+    def get_file(self, name: str) -> SoundFile:
+        return self._files[name]
+
+    def find_names(self, paths: set[str]) -> set[str]:
+        # Names of sounds affected by changed file paths
+        sounds_dir = os.path.abspath(self._sounds_dir)
+        names = set()
+        for path in paths:
+            if os.path.dirname(os.path.abspath(path)) != sounds_dir:
+                continue
+            fname = os.path.basename(path)
+            name, suffix = os.path.splitext(fname)
+            if fname.startswith(".") or suffix not in self._suffixes:
+                continue
+            names.add(name)
+        return names
+
+    async def reindex(self, names: set[str]) -> dict[str, SoundFile | None]:
+        # Reading headers may block on disk access
+        sound_files = await self._loop.run_in_executor(None, self._read_files, names)
+        for name, sound_file in sound_files.items():
+            # Drop the decoded sound, next load decodes the new file
+            entry = self._cache.pop(name, None)
+            if entry is not None:
+                self._cache_usage -= entry[1]
+            if sound_file is None:
+                self._files.pop(name, None)
+            else:
+                self._files[name] = sound_file
+        return sound_files
+
+    def _read_files(self, names: set[str]) -> dict[str, SoundFile | None]:
+        res: dict[str, SoundFile | None] = {}
+        for name in names:
+            res[name] = None
+            # Same precedence as scan() (sorted file names)
+            for suffix in sorted(self._suffixes):
+                path = os.path.join(self._sounds_dir, name + suffix)
+                if not os.path.isfile(path):
+                    continue
+                try:
+                    res[name] = SoundFile(
+                        path, read_sound_duration(path), os.path.getsize(path)
+                    )
+                    break
+                except (OSError, EOFError, ValueError, wave.Error):
+                    _LOGGER.exception("unable to read sound file header: %s", path)
+        return res
+
+    def close(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    async def load(self, name: str) -> pygame.mixer.Sound:
+        if name in self._cache:
+            self._cache.move_to_end(name)
+            return self._cache[name][0]
+        return await asyncio.shield(self._start_loading(name))
+
+    def prefetch(self, names: list[str]):
+        for name in names:
+            if name not in self._files or name in self._cache:
+                continue
+            if name in self._loading:
+                continue
+            _LOGGER.info("prefetch sound: %s", name)
+            self._start_loading(name).add_done_callback(self._prefetch_done)
+
+    def is_cached(self, name: str) -> bool:
+        return name in self._cache
+
+    def pin(self, names: list[str]):
+        # Pinned sounds are not evicted from cache
+        self._pinned = set(names)
+        self._evict()
+
+    def _start_loading(self, name: str) -> asyncio.Task:
+        # Share decoding of the same sound between concurrent callers
+        task = self._loading.get(name)
+        if task is None:
+            task = asyncio.create_task(self._load(name))
+            self._loading[name] = task
+            task.add_done_callback(lambda _: self._loading.pop(name, None))
+        return task
+
+    async def _load(self, name: str) -> pygame.mixer.Sound:
+        path = self._files[name].path
+        if self._pcm_cache is not None:
+            sound = await self._loop.run_in_executor(
+                self._executor, self._pcm_cache.load, path
+            )
+        else:
+            sound = await self._loop.run_in_executor(self._executor, decode_sound, path)
+        self._add_to_cache(name, sound)
+        return sound
+
+    def _add_to_cache(self, name: str, sound: pygame.mixer.Sound):
+        if name in self._cache:
+            return
+        decoded_size = self._decoded_size(self._files[name])
+        self._cache[name] = (sound, decoded_size)
+        self._cache_usage += decoded_size
+        self._evict()
+
+    def _prefetch_done(self, task: asyncio.Task):
+        if task.cancelled():
+            return
+        if task.exception() is not None:
+            _LOGGER.error("prefetch failed: %r", task.exception())
+
+    def _evict(self):
+        for name in list(self._cache.keys()):
+            if self._cache_usage <= self._cache_size or len(self._cache) <= 1:
+                break
+            if name in self._pinned:
+                continue
+            _LOGGER.info("evict sound from cache: %s", name)
+            _, decoded_size = self._cache.pop(name)
+            self._cache_usage -= decoded_size
+
+    def _decoded_size(self, sound_file: SoundFile) -> int:
+        frequency, size, channels = pygame.mixer.get_init()
+        return int(sound_file.duration * frequency) * abs(size) // 8 * channels
+
+
+def _log_future_error(future: asyncio.Future):
+    # Consumes the exception of a fire and forget executor job
+    if not future.cancelled() and future.exception() is not None:
+        _LOGGER.error("background sound job failed: %r", future.exception())
+
+
+def play_music(path: str, fade_ms: int):
+    pygame.mixer.music.load(path)
+    pygame.mixer.music.play(fade_ms=fade_ms)
+
+
+def advise_willneed(path: str):
+    if not hasattr(os, "posix_fadvise"):
+        return
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_WILLNEED)
+    finally:
+        os.close(fd)
+
+
+def read_sound_duration(path: str) -> float:
+    # Duration from file headers only (no decoding)
+    if path.endswith(".ogg"):
+        return read_ogg_duration(path)
+    with wave.open(path, "rb") as f:
+        return f.getnframes() / f.getframerate()
+
+
+def read_ogg_duration(path: str) -> float:
+    with open(path, "rb") as f:
+        # Sample rate from Vorbis identification header (first page)
+        head = f.read(4096)
+        pos = head.find(b"\x01vorbis")
+        if not head.startswith(b"OggS") or pos < 0:
+            raise ValueError("Not an Ogg Vorbis file: %s" % (path))
+        sample_rate = int.from_bytes(head[pos + 12 : pos + 16], "little")
 
-def load_sounds(sounds_dir: str, suffix: str = ".wav") -> dict[str, pygame.mixer.Sound]:
-    _LOGGER.info("load sounds... (dir: %s)" % (sounds_dir))
-    start_time = time.time()
-
-    res = {}
-    for fname in os.listdir(sounds_dir):
-        if not fname.endswith(suffix):
-            _LOGGER.warning("unknown sound file: %s" % (fname))
-            continue
-        _LOGGER.info("loading sound file: %s" % (fname))
-        sound_file_path = os.path.join(sounds_dir, fname)
-        name = fname[: -len(suffix)]
-        sound = pygame.mixer.Sound(sound_file_path)
-        res[name] = sound
-    _LOGGER.info("load sounds done in: %.3f s" % (time.time() - start_time))
-    return res
+        # Total number of samples from granule position of the last page
+        f.seek(0, os.SEEK_END)
+        f.seek(max(0, f.tell() - 65536))
+        tail = f.read()
+        pos = tail.rfind(b"OggS")
+        if pos < 0 or sample_rate <= 0:
+            raise ValueError("Invalid Ogg file: %s" % (path))
+        granule = int.from_bytes(tail[pos + 6 : pos + 14], "little")
+        return granule / sample_rate
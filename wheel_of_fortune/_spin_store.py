@@ -0,0 +1,446 @@
+import time
+import math
+import asyncio
+import logging
+import sqlite3
+import functools
+import concurrent.futures
+from ._config import Config
+from ._utils import chi_square_uniform, chi_square_p_value
+from .schemas import FairnessState, SpinInfo, SpinPage, SpinStats, RpmHistogramBin
+
+_LOGGER = logging.getLogger(__name__)
+
+__all__ = [
+    "SpinStore",
+]
+
+SCHEMA_VERSION = 1
+RPM_BIN_WIDTH = 2.0
+# Spins buffered while the database is not open or not writable
+MAX_PENDING_SPINS = 10000
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS spins (
+    id INTEGER PRIMARY KEY,
+    start_time REAL NOT NULL,
+    end_time REAL NOT NULL,
+    start_sector INTEGER NOT NULL,
+    end_sector INTEGER NOT NULL,
+    end_sector_name TEXT NOT NULL,
+    total_sectors INTEGER NOT NULL,
+    duration REAL NOT NULL,
+    avg_rpm REAL NOT NULL,
+    theme_id TEXT NOT NULL,
+    effect_id TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS spins_end_time ON spins (end_time);
+CREATE TABLE IF NOT EXISTS sector_wins (
+    sector INTEGER PRIMARY KEY,
+    wins INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS rpm_histogram (
+    bin INTEGER PRIMARY KEY,
+    count INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS sector_transitions (
+    start_sector INTEGER NOT NULL,
+    end_sector INTEGER NOT NULL,
+    count INTEGER NOT NULL,
+    PRIMARY KEY (start_sector, end_sector)
+);
+CREATE TABLE IF NOT EXISTS total_sectors_histogram (
+    total_sectors INTEGER PRIMARY KEY,
+    count INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS spin_totals (
+    id INTEGER PRIMARY KEY CHECK (id = 0),
+    spins INTEGER NOT NULL,
+    duration_sum REAL NOT NULL,
+    avg_rpm_sum REAL NOT NULL,
+    total_sectors_mean REAL NOT NULL,
+    total_sectors_m2 REAL NOT NULL
+);
+"""
+
+SPIN_COLUMNS = (
+    "id",
+    "start_time",
+    "end_time",
+    "start_sector",
+    "end_sector",
+    "end_sector_name",
+    "total_sectors",
+    "duration",
+    "avg_rpm",
+    "theme_id",
+    "effect_id",
+)
+
+
+def rpm_bin(avg_rpm: float) -> int:
+    return int(avg_rpm // RPM_BIN_WIDTH)
+
+
+class SpinAggregates:
+    """Win counts per sector, RPM histogram and totals of a set of spins.
+
+    Also start to end sector transitions and the distribution of sectors
+    passed per spin, with its mean and variance kept by Welford's algorithm.
+    """
+
+    def __init__(self):
+        self.spins: int = 0
+        self.duration_sum: float = 0.0
+        self.avg_rpm_sum: float = 0.0
+        self.sector_wins: dict[int, int] = {}
+        self.rpm_histogram: dict[int, int] = {}
+        self.transitions: dict[tuple[int, int], int] = {}
+        self.total_sectors_histogram: dict[int, int] = {}
+        self.total_sectors_mean: float = 0.0
+        self.total_sectors_m2: float = 0.0  # Sum of squared deviations
+
+    def add(self, spin: SpinInfo):
+        self.spins += 1
+        self.duration_sum += spin.duration
+        self.avg_rpm_sum += spin.avg_rpm
+        self.sector_wins[spin.end_sector] = self.sector_wins.get(spin.end_sector, 0) + 1
+        b = rpm_bin(spin.avg_rpm)
+        self.rpm_histogram[b] = self.rpm_histogram.get(b, 0) + 1
+        key = (spin.start_sector, spin.end_sector)
+        self.transitions[key] = self.transitions.get(key, 0) + 1
+        x = spin.total_sectors
+        self.total_sectors_histogram[x] = self.total_sectors_histogram.get(x, 0) + 1
+        delta = x - self.total_sectors_mean
+        self.total_sectors_mean += delta / self.spins
+        self.total_sectors_m2 += delta * (x - self.total_sectors_mean)
+
+    def remove(self, spin: SpinInfo):
+        self.spins -= 1
+        self.duration_sum -= spin.duration
+        self.avg_rpm_sum -= spin.avg_rpm
+        self.sector_wins[spin.end_sector] -= 1
+        self.rpm_histogram[rpm_bin(spin.avg_rpm)] -= 1
+        self.transitions[(spin.start_sector, spin.end_sector)] -= 1
+        x = spin.total_sectors
+        self.total_sectors_histogram[x] -= 1
+        if self.spins == 0:
+            self.total_sectors_mean = 0.0
+            self.total_sectors_m2 = 0.0
+            return
+        # Welford update in reverse
+        mean = self.total_sectors_mean
+        self.total_sectors_mean = (mean * (self.spins + 1) - x) / self.spins
+        self.total_sectors_m2 -= (x - self.total_sectors_mean) * (x - mean)
+
+    def get_stats(self, num_sectors: int) -> SpinStats:
+        sector_wins = [self.sector_wins.get(i, 0) for i in range(num_sectors)]
+        stats = SpinStats(
+            spins=self.spins,
+            sector_wins=sector_wins,
+            rpm_histogram=[
+                RpmHistogramBin(
+                    rpm_min=b * RPM_BIN_WIDTH,
+                    rpm_max=(b + 1) * RPM_BIN_WIDTH,
+                    count=count,
+                )
+                for b, count in sorted(self.rpm_histogram.items())
+            ],
+        )
+        if self.spins > 0:
+            stats.duration_avg = self.duration_sum / self.spins
+            stats.avg_rpm_avg = self.avg_rpm_sum / self.spins
+        if sum(sector_wins) > 0 and num_sectors > 1:
+            stats.chi_square = chi_square_uniform(sector_wins)
+            stats.p_value = chi_square_p_value(stats.chi_square, num_sectors - 1)
+        return stats
+
+    def get_fairness(self, num_sectors: int) -> FairnessState:
+        # Sectors out of range (number of sectors changed) are not counted
+        sector_counts = [self.sector_wins.get(i, 0) for i in range(num_sectors)]
+        state = FairnessState(
+            spins=self.spins,
+            sector_counts=sector_counts,
+            transitions=[
+                [self.transitions.get((i, j), 0) for j in range(num_sectors)]
+                for i in range(num_sectors)
+            ],
+            total_sectors={
+                x: count
+                for x, count in sorted(self.total_sectors_histogram.items())
+                if count > 0
+            },
+        )
+        if sum(sector_counts) > 0 and num_sectors > 1:
+            state.chi_square = chi_square_uniform(sector_counts)
+            state.p_value = chi_square_p_value(state.chi_square, num_sectors - 1)
+        if self.spins > 0:
+            state.total_sectors_mean = self.total_sectors_mean
+        if self.spins > 1:
+            state.total_sectors_std = math.sqrt(
+                max(0.0, self.total_sectors_m2) / (self.spins - 1)
+            )
+        return state
+
+
+class SpinStore:
+    """History of spins in SQLite, with incrementally maintained aggregates.
+
+    Spins are buffered and inserted in batches by a single database thread
+    (WAL mode), together with updates of the aggregate tables. All time
+    aggregates are also kept in memory, so stats are served without queries.
+    """
+
+    def __init__(self, config, filename: str):
+        self._config: Config = config
+        self._filename: str = filename
+        self._loop = asyncio.get_running_loop()
+        # SQLite connection is used only from this thread
+        self._executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="spin_store"
+        )
+        self._db: sqlite3.Connection | None = None
+        self._pending: list[SpinInfo] = []
+        self._aggregates = SpinAggregates()
+
+    async def open(self):
+        _LOGGER.info("open (%s)", self._filename)
+        aggregates = await self._run(self._open_db)
+        # Spins added before open are not stored yet, count them on top
+        for spin in self._pending:
+            aggregates.add(spin)
+        self._aggregates = aggregates
+
+    async def close(self):
+        _LOGGER.info("close")
+        try:
+            if self._db is not None:
+                await self.flush()
+                await self._run(self._db.close)
+                self._db = None
+        finally:
+            self._executor.shutdown()
+
+    async def maintain(self):
+        while True:
+            await asyncio.sleep(self._config.spin_store_flush_secs)
+            try:
+                await self.flush()
+            except Exception:
+                _LOGGER.exception("unable to store spins, retry later")
+
+    def add(self, spin: SpinInfo):
+        """Buffers spin for the next batch insert, aggregates are updated now."""
+        self._pending.append(spin)
+        self._aggregates.add(spin)
+        if len(self._pending) > MAX_PENDING_SPINS:
+            # Database not open or failing, keep the newest spins only
+            _LOGGER.warning("too many spins not stored, drop oldest")
+            self._aggregates.remove(self._pending.pop(0))
+
+    async def flush(self):
+        if len(self._pending) == 0 or self._db is None:
+            return
+        spins, self._pending = self._pending, []
+        future = self._loop.run_in_executor(self._executor, self._insert_spins, spins)
+        future.add_done_callback(functools.partial(self._insert_done, spins))
+        # Not cancelled with the caller, a started insert may have committed
+        await asyncio.shield(future)
+        _LOGGER.debug("stored %d spins", len(spins))
+
+    def _insert_done(self, spins: list[SpinInfo], future: asyncio.Future):
+        # Nothing was committed on errors, retried by the next flush
+        if not future.cancelled() and isinstance(future.exception(), sqlite3.Error):
+            self._pending[:0] = spins
+
+    async def get_spins(self, limit: int, before_id: int | None = None) -> SpinPage:
+        """Page of spins, newest first, older pages by the returned cursor."""
+        self._check_open()
+        await self.flush()
+        spins = await self._run(self._select_spins, limit, before_id)
+        next_before_id = None
+        if len(spins) == limit and len(spins) > 0:
+            next_before_id = spins[-1].id
+        return SpinPage(spins=spins, next_before_id=next_before_id)
+
+    async def get_stats(
+        self, since: float | None = None, until: float | None = None
+    ) -> SpinStats:
+        """Aggregates of all spins, or of spins ended in [since, until)."""
+        num_sectors = self._config.num_sectors
+        if since is None and until is None:
+            return self._aggregates.get_stats(num_sectors)
+        self._check_open()
+        await self.flush()
+        aggregates = await self._run(self._select_aggregates, since, until)
+        return aggregates.get_stats(num_sectors)
+
+    def get_fairness(self) -> FairnessState:
+        """Fairness of all spins, from the in-memory aggregates."""
+        return self._aggregates.get_fairness(self._config.num_sectors)
+
+    def _check_open(self):
+        if self._db is None:
+            raise RuntimeError("Spin store not open")
+
+    async def _run(self, func, *args):
+        return await self._loop.run_in_executor(self._executor, func, *args)
+
+    def _open_db(self) -> SpinAggregates:
+        start_time = time.monotonic()
+        db = sqlite3.connect(self._filename, check_same_thread=False)
+        try:
+            db.execute("PRAGMA journal_mode=WAL")
+            # Durable enough with WAL, a crash loses at most the last transaction
+            db.execute("PRAGMA synchronous=NORMAL")
+            version = db.execute("PRAGMA user_version").fetchone()[0]
+            if version > SCHEMA_VERSION:
+                raise ValueError("unsupported spin store version: %d" % (version))
+            with db:
+                db.executescript(SCHEMA)
+                db.execute("PRAGMA user_version=%d" % (SCHEMA_VERSION))
+
+            aggregates = SpinAggregates()
+            row = db.execute(
+                "SELECT spins, duration_sum, avg_rpm_sum, total_sectors_mean,"
+                " total_sectors_m2 FROM spin_totals"
+            ).fetchone()
+            if row is not None:
+                (
+                    aggregates.spins,
+                    aggregates.duration_sum,
+                    aggregates.avg_rpm_sum,
+                    aggregates.total_sectors_mean,
+                    aggregates.total_sectors_m2,
+                ) = row
+            aggregates.sector_wins = dict(
+                db.execute("SELECT sector, wins FROM sector_wins")
+            )
+            aggregates.rpm_histogram = dict(
+                db.execute("SELECT bin, count FROM rpm_histogram")
+            )
+            aggregates.transitions = {
+                (start_sector, end_sector): count
+                for start_sector, end_sector, count in db.execute(
+                    "SELECT start_sector, end_sector, count FROM sector_transitions"
+                )
+            }
+            aggregates.total_sectors_histogram = dict(
+                db.execute("SELECT total_sectors, count FROM total_sectors_histogram")
+            )
+        except Exception:
+            db.close()
+            raise
+        self._db = db
+        _LOGGER.info(
+            "opened in %.3f s (%d spins)",
+            time.monotonic() - start_time,
+            aggregates.spins,
+        )
+        return aggregates
+
+    def _insert_spins(self, spins: list[SpinInfo]):
+        assert self._db is not None
+        batch = SpinAggregates()
+        for spin in spins:
+            batch.add(spin)
+        with self._db:
+            self._db.executemany(
+                "INSERT INTO spins (%s) VALUES (%s)"
+                % (", ".join(SPIN_COLUMNS[1:]), ", ".join("?" * len(SPIN_COLUMNS[1:]))),
+                [
+                    tuple(getattr(spin, column) for column in SPIN_COLUMNS[1:])
+                    for spin in spins
+                ],
+            )
+            self._db.executemany(
+                "INSERT INTO sector_wins (sector, wins) VALUES (?, ?)"
+                " ON CONFLICT (sector) DO UPDATE SET wins = wins + excluded.wins",
+                batch.sector_wins.items(),
+            )
+            self._db.executemany(
+                "INSERT INTO rpm_histogram (bin, count) VALUES (?, ?)"
+                " ON CONFLICT (bin) DO UPDATE SET count = count + excluded.count",
+                batch.rpm_histogram.items(),
+            )
+            self._db.executemany(
+                "INSERT INTO sector_transitions (start_sector, end_sector, count)"
+                " VALUES (?, ?, ?) ON CONFLICT (start_sector, end_sector)"
+                " DO UPDATE SET count = count + excluded.count",
+                [(i, j, count) for (i, j), count in batch.transitions.items()],
+            )
+            self._db.executemany(
+                "INSERT INTO total_sectors_histogram (total_sectors, count)"
+                " VALUES (?, ?)"
+                " ON CONFLICT (total_sectors) DO UPDATE SET count = count + excluded.count",
+                batch.total_sectors_histogram.items(),
+            )
+            # Moments of the batch are combined with the stored ones by the
+            # parallel form of Welford's algorithm, SET sees the old row
+            self._db.execute(
+                "INSERT INTO spin_totals (id, spins, duration_sum, avg_rpm_sum,"
+                " total_sectors_mean, total_sectors_m2)"
+                " VALUES (0, ?, ?, ?, ?, ?) ON CONFLICT (id) DO UPDATE SET"
+                " spins = spins + excluded.spins,"
+                " duration_sum = duration_sum + excluded.duration_sum,"
+                " avg_rpm_sum = avg_rpm_sum + excluded.avg_rpm_sum,"
+                " total_sectors_mean = total_sectors_mean"
+                " + (excluded.total_sectors_mean - total_sectors_mean)"
+                " * excluded.spins / (spins + excluded.spins),"
+                " total_sectors_m2 = total_sectors_m2 + excluded.total_sectors_m2"
+                " + (excluded.total_sectors_mean - total_sectors_mean)"
+                " * (excluded.total_sectors_mean - total_sectors_mean)"
+                " * spins * excluded.spins / (spins + excluded.spins)",
+                (
+                    batch.spins,
+                    batch.duration_sum,
+                    batch.avg_rpm_sum,
+                    batch.total_sectors_mean,
+                    batch.total_sectors_m2,
+                ),
+            )
+
+    def _select_spins(self, limit: int, before_id: int | None) -> list[SpinInfo]:
+        assert self._db is not None
+        query = "SELECT %s FROM spins" % (", ".join(SPIN_COLUMNS))
+        params: tuple = ()
+        if before_id is not None:
+            query += " WHERE id < ?"
+            params = (before_id,)
+        query += " ORDER BY id DESC LIMIT ?"
+        rows = self._db.execute(query, params + (limit,))
+        return [SpinInfo(**dict(zip(SPIN_COLUMNS, row))) for row in rows]
+
+    def _select_aggregates(
+        self, since: float | None, until: float | None
+    ) -> SpinAggregates:
+        assert self._db is not None
+        where = "end_time >= ? AND end_time < ?"
+        params = (
+            since if since is not None else float("-inf"),
+            until if until is not None else float("inf"),
+        )
+        aggregates = SpinAggregates()
+        row = self._db.execute(
+            "SELECT COUNT(*), TOTAL(duration), TOTAL(avg_rpm) FROM spins WHERE %s"
+            % (where),
+            params,
+        ).fetchone()
+        aggregates.spins, aggregates.duration_sum, aggregates.avg_rpm_sum = row
+        aggregates.sector_wins = dict(
+            self._db.execute(
+                "SELECT end_sector, COUNT(*) FROM spins WHERE %s GROUP BY end_sector"
+                % (where),
+                params,
+            )
+        )
+        aggregates.rpm_histogram = dict(
+            self._db.execute(
+                # Floor as in rpm_bin(), CAST truncates toward zero
+                "SELECT bin - (x < bin) AS floor_bin, COUNT(*) FROM ("
+                "SELECT avg_rpm / ? AS x, CAST(avg_rpm / ? AS INTEGER) AS bin"
+                " FROM spins WHERE %s) GROUP BY floor_bin" % (where),
+                (RPM_BIN_WIDTH, RPM_BIN_WIDTH) + params,
+            )
+        )
+        return aggregates
@@ -0,0 +1,65 @@
+import os
+import time
+import logging
+
+_LOGGER = logging.getLogger(__name__)
+
+__all__ = [
+    "StartupProfile",
+    "startup_profile",
+]
+
+
+def process_age() -> float:
+    """Seconds since the process was started (0.0 if unknown)."""
+    try:
+        with open("/proc/self/stat", "r") as f:
+            # Process name may contain spaces, fields follow the last ")"
+            fields = f.read().rsplit(")", 1)[1].split()
+        with open("/proc/uptime", "r") as f:
+            uptime = float(f.read().split()[0])
+    except (OSError, IndexError, ValueError):
+        return 0.0
+    start_time = int(fields[19]) / os.sysconf("SC_CLK_TCK")
+    return max(0.0, uptime - start_time)
+
+
+class StartupProfile:
+    """Timings of startup phases, relative to the process start.
+
+    Phases are always recorded (cheap), in profile mode they are logged at
+    info level and summarized by report(). For per module import times run
+    with "python -X importtime".
+    """
+
+    def __init__(self):
+        self._start_time: float = time.monotonic() - process_age()
+        self._phases: list[tuple[str, float]] = []
+        self.enabled: bool = False
+
+    def uptime(self) -> float:
+        return time.monotonic() - self._start_time
+
+    def mark(self, phase: str):
+        elapsed = time.monotonic() - self._start_time
+        self._phases.append((phase, elapsed))
+        _LOGGER.log(
+            logging.INFO if self.enabled else logging.DEBUG,
+            "startup phase %s: %.3f s",
+            phase,
+            elapsed,
+        )
+
+    def report(self):
+        if not self.enabled:
+            return
+        prev = 0.0
+        lines = []
+        for phase, elapsed in self._phases:
+            lines.append("  %-24s %8.3f s (+%.3f s)" % (phase, elapsed, elapsed - prev))
+            prev = elapsed
+        _LOGGER.info("startup profile:\n%s", "\n".join(lines))
+
+
+# Created on first import, i.e. before the heavy imports of __main__
+startup_profile = StartupProfile()
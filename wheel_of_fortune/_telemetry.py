@@ -1,15 +1,37 @@
 import socket
 import asyncio
 import logging
-import influxdb_client
-from influxdb_client.client.influxdb_client_async import InfluxDBClientAsync
+from typing import Any
 from ._config import Config
 
 _LOGGER = logging.getLogger(__name__)
 
 
-class Point(influxdb_client.Point):
-    pass
+class Point:
+    """Telemetry data point (InfluxDB measurement with tags and fields).
+
+    Independent of influxdb_client, which is imported only if configured.
+    """
+
+    def __init__(self, measurement: str):
+        self._measurement: str = measurement
+        self._tags: dict[str, str] = {}
+        self._fields: dict[str, Any] = {}
+
+    def tag(self, key: str, value: str) -> "Point":
+        self._tags[key] = value
+        return self
+
+    def field(self, key: str, value: Any) -> "Point":
+        self._fields[key] = value
+        return self
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "measurement": self._measurement,
+            "tags": self._tags,
+            "fields": self._fields,
+        }
 
 
 class Telemetry:
@@ -18,18 +40,23 @@ class Telemetry:
         self._hostname = socket.gethostname()
         self._influxdb = None
         if config.influxdb_url is not None and config.influxdb_token is not None:
+            # Slow to import, only needed if configured
+            from influxdb_client.client.influxdb_client_async import (
+                InfluxDBClientAsync,
+            )
+
             self._influxdb = InfluxDBClientAsync(
                 url=config.influxdb_url,
                 token=config.influxdb_token,
             )
         self._background_tasks = set()
+        # Last failed write (message, loop time)
+        self.last_error: tuple[str, float] | None = None
 
     async def open(self):
         if self._influxdb is None:
             return
-        _LOGGER.info(
-            "open, name: %s, hostname: %s" % (self._config.name, self._hostname)
-        )
+        _LOGGER.info("open, name: %s, hostname: %s", self._config.name, self._hostname)
 
     async def close(self):
         if self._influxdb is None:
@@ -47,7 +74,7 @@ class Telemetry:
             return
         if len(self._background_tasks) > 1000:
             _LOGGER.error(
-                "Queue full (%d), discard data point" % (len(self._background_tasks))
+                "Queue full (%d), discard data point", len(self._background_tasks)
             )
 
         point.tag("name", self._config.name)
@@ -56,7 +83,9 @@ class Telemetry:
         write_api = self._influxdb.write_api()
         task = asyncio.create_task(
             write_api.write(
-                self._config.influxdb_bucket, self._config.influxdb_org, point
+                self._config.influxdb_bucket,
+                self._config.influxdb_org,
+                point.to_dict(),
             )
         )
         self._background_tasks.add(task)
@@ -65,9 +94,10 @@ class Telemetry:
     def _task_finished(self, task):
         try:
             task.result()
-        except Exception:
+        except Exception as e:
+            self.last_error = (repr(e), asyncio.get_running_loop().time())
             _LOGGER.error(
-                "Error, discard datapoint (%d in queue)" % (len(self._background_tasks))
+                "Error, discard datapoint (%d in queue)", len(self._background_tasks)
             )
         finally:
             self._background_tasks.discard(task)
@@ -1,6 +1,7 @@
-import yaml
 import logging
-import mergedeep
+from pydantic import TypeAdapter
+from ._inheritance import compile_definitions
+from ._content_cache import ContentCache, load_yaml
 from .schemas import ThemeInfo
 
 _LOGGER = logging.getLogger(__name__)
@@ -23,40 +24,42 @@ class Theme(ThemeInfo):
         self._sound_index = (self._sound_index + 1) % len(self.theme_sounds)
         return res
 
+    def peek_theme_sound(self) -> str | None:
+        # Sound returned by the next call of next_theme_sound
+        if len(self.theme_sounds) <= 0:
+            return None
+        return self.theme_sounds[self._sound_index]
+
+    def upcoming_sounds(self) -> list[str]:
+        res = [self.poweroff_sound]
+        next_sound = self.peek_theme_sound()
+        if next_sound is not None:
+            res.append(next_sound)
+        return res
+
     def get_info(self) -> ThemeInfo:
         return self
 
 
-def load_themes(filename: str):
-    _LOGGER.info("load themes: %s" % (filename))
+_ADAPTER = TypeAdapter(dict[str, Theme])
 
-    def merge(base, addition):
-        res = mergedeep.merge({}, base, addition)
-        res["based_on"] = base.get("based_on", []) + addition.get("based_on", [])
-        res["visible"] = addition.get("visible", True)
-        return res
 
-    def compile(_id):
-        theme = themes[_id]
-        if "based_on" in theme:
-            res = {}
-            for base_id in theme["based_on"]:
-                base_theme = compile(base_id)
-                res = merge(base_theme, theme)
-            return res
-        else:
-            return theme
+def load_themes(filename: str, cache: ContentCache | None = None) -> dict[str, Theme]:
+    _LOGGER.info("load themes: %s", filename)
+    if cache is not None:
+        return cache.load(filename, _ADAPTER, _compile_themes)
+    return _compile_themes(filename)
+
 
+def _compile_themes(filename: str) -> dict[str, Theme]:
     try:
-        with open(filename, "r") as fin:
-            themes = yaml.safe_load(fin)
+        themes = load_yaml(filename)
     except Exception as e:
         raise RuntimeError("Error on loading %s file" % (filename)) from e
 
     res = {}
-    for theme_id, theme in themes.items():
-        if not theme.get("visible", True):
+    for theme_id, params in compile_definitions(themes, kind="theme").items():
+        if not params.get("visible", True):
             continue
-        params = compile(theme_id)
         res[theme_id] = Theme.model_validate(params)
     return res
@@ -0,0 +1,105 @@
+import asyncio
+import logging
+from ._effects import Effect
+from ._leds import LedController
+from ._servos import ServoController
+from ._soundsystem import SoundSystem, MAIN_CH
+from ._wled import WledClient
+from .schemas import KeyframeInfo, LedsStateIn, TimelineAction
+
+_LOGGER = logging.getLogger(__name__)
+
+__all__ = [
+    "Timeline",
+]
+
+
+class Timeline:
+    """Plays effect keyframes at fixed offsets from a single start time.
+
+    Keyframes are scheduled against the monotonic loop clock (no drift from
+    preceding actions). Actions sent to WLED are issued ahead by the measured
+    network latency so that they land on time. If the timeline is cancelled,
+    running actions are cancelled and actuators are rolled back to rest.
+    """
+
+    def __init__(self, effect, servos, leds, soundsystem, wled):
+        self._effect: Effect = effect
+        self._servos: ServoController = servos
+        self._leds: LedController = leds
+        self._soundsystem: SoundSystem = soundsystem
+        self._wled: WledClient = wled
+        self._loop = asyncio.get_running_loop()
+
+    async def run(self):
+        keyframes = sorted(self._effect.get_timeline(), key=self._issue_time)
+        start_time = self._loop.time()
+        tasks: list[asyncio.Task] = []
+        try:
+            for keyframe in keyframes:
+                delay = start_time + self._issue_time(keyframe) - self._loop.time()
+                if delay > 0.0:
+                    await asyncio.sleep(delay)
+                _LOGGER.debug(
+                    "keyframe %s at %.3f s (scheduled %.3f s)",
+                    keyframe.action.value,
+                    self._loop.time() - start_time,
+                    keyframe.at,
+                )
+                tasks.append(asyncio.create_task(self._run_action(keyframe)))
+            await asyncio.gather(*tasks)
+        except BaseException:
+            _LOGGER.info("timeline was not completed, rolling back")
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            await self._rollback()
+            raise
+
+    def _issue_time(self, keyframe: KeyframeInfo) -> float:
+        if keyframe.action in (TimelineAction.SERVOS, TimelineAction.LEDS):
+            return max(0.0, keyframe.at - self._wled.latency)
+        return keyframe.at
+
+    async def _run_action(self, keyframe: KeyframeInfo):
+        effect = self._effect
+        action = keyframe.action
+        if action == TimelineAction.SERVOS:
+            assert keyframe.pos is not None  # Checked by KeyframeInfo
+            motors = keyframe.motors
+            if motors is None:
+                motors = effect.active_servos
+            await self._servos.move_to_pos(
+                keyframe.pos, motor_names=None if motors == "all" else motors
+            )
+        elif action == TimelineAction.LEDS:
+            preset = keyframe.leds_preset
+            if preset is None:
+                preset = effect.leds_preset
+            await self._leds.set_state(
+                LedsStateIn(segments=preset, transition_ms=keyframe.transition_ms)
+            )
+        elif action == TimelineAction.SOUND_PLAY:
+            sound = keyframe.sound
+            if sound is None:
+                sound = effect.effect_sound
+            await self._soundsystem.play(keyframe.channel, sound)
+        elif action == TimelineAction.SOUND_FADEOUT:
+            await self._soundsystem.fadeout(keyframe.channel, fade_ms=keyframe.time_ms)
+            await asyncio.sleep(1e-3 * keyframe.time_ms)
+        elif action == TimelineAction.VOLUME_SWEEP:
+            await self._soundsystem.volume_sweep(
+                keyframe.channel,
+                keyframe.volume_from,
+                keyframe.volume_to,
+                time_ms=keyframe.time_ms,
+                curve=keyframe.curve.value,
+            )
+        else:
+            raise ValueError("unknown timeline action: %s" % (action))
+
+    async def _rollback(self):
+        await asyncio.gather(
+            self._soundsystem.fadeout(MAIN_CH, fade_ms=2000),
+            self._servos.move_to_pos(0.0),
+        )
@@ -1,3 +1,4 @@
+import math
 import asyncio
 import logging
 from typing import Callable
@@ -7,6 +8,8 @@ _LOGGER = logging.getLogger(__name__)
 __all__ = [
     "decode_grey_code",
     "encode_gray_code",
+    "chi_square_uniform",
+    "chi_square_p_value",
     "AsyncTimer",
 ]
 
@@ -24,6 +27,59 @@ def encode_gray_code(num: int) -> int:
     return num ^ (num >> 1)
 
 
+def chi_square_uniform(counts: list[int]) -> float:
+    """Pearson's chi-square statistic of counts against a uniform distribution."""
+    total = sum(counts)
+    if total == 0:
+        return 0.0
+    expected = total / len(counts)
+    return sum((count - expected) ** 2 for count in counts) / expected
+
+
+def chi_square_p_value(chi_square: float, dof: int) -> float:
+    """Probability of a chi-square statistic at least this large (upper tail)."""
+    if dof <= 0:
+        raise ValueError("degrees of freedom must be positive")
+    return _regularized_gamma_q(0.5 * dof, 0.5 * chi_square)
+
+
+def _regularized_gamma_q(a: float, x: float) -> float:
+    # Upper regularized incomplete gamma function Q(a, x), series for small x
+    # and Lentz's continued fraction otherwise (Numerical Recipes, gammq)
+    if x <= 0.0:
+        return 1.0
+    log_prefactor = -x + a * math.log(x) - math.lgamma(a)
+    if x < a + 1.0:
+        term = total = 1.0 / a
+        n = a
+        for _ in range(1000):
+            n += 1.0
+            term *= x / n
+            total += term
+            if abs(term) < abs(total) * 1e-15:
+                break
+        return max(0.0, 1.0 - total * math.exp(log_prefactor))
+
+    tiny = 1e-300
+    b = x + 1.0 - a
+    c = 1.0 / tiny
+    d = 1.0 / b
+    h = d
+    for i in range(1, 1000):
+        an = -i * (i - a)
+        b += 2.0
+        d = an * d + b
+        d = tiny if abs(d) < tiny else d
+        c = b + an / c
+        c = tiny if abs(c) < tiny else c
+        d = 1.0 / d
+        delta = d * c
+        h *= delta
+        if abs(delta - 1.0) < 1e-15:
+            break
+    return math.exp(log_prefactor) * h
+
+
 async def gather_or_cancel(*coros, **kwargs):
     tasks = [asyncio.create_task(coro) for coro in coros]
     try:
@@ -1,19 +1,29 @@
 import os
+import time
 import asyncio
 import logging
+import functools
+import watchfiles
 import importlib.metadata
 from enum import Enum
 from typing import Callable
+from pydantic import BaseModel
 from ._utils import gather_or_cancel
 from ._config import Config
 from ._settings import SettingsManager, Settings
 from ._encoder import Encoder
 from ._leds import LedController
 from ._servos import ServoController
+from ._wled import WledClient
 from ._soundsystem import SoundSystem, MAIN_CH, EFFECT_CH
 from ._telemetry import Telemetry, Point
 from ._themes import load_themes, Theme
 from ._effects import load_effects, Effect
+from ._content_cache import ContentCache
+from ._startup import startup_profile
+from ._loop_monitor import LoopMonitor
+from ._spin_store import SpinStore
+from ._timeline import Timeline
 from .schemas import (
     EncoderState,
     LedsState,
@@ -22,9 +32,13 @@ from .schemas import (
     SoundSystemState,
     SectorState,
     SectorStateIn,
+    SpinInfo,
+    HealthState,
+    SubsystemHealth,
     WheelState,
     WheelStateIn,
     WheelInfo,
+    WheelInfoUpdate,
     WheelStateUpdate,
 )
 
@@ -61,15 +75,18 @@ class Sector:
             self.effect_id = self._settings["effect_id"]
 
     def set_state(self, state: SectorStateIn):
-        _LOGGER.info("set state %d: %s" % (self.index, state))
+        _LOGGER.info("set state %d: %s", self.index, state)
+        if state.effect_id is not None and state.effect_id not in self._effects:
+            raise ValueError("unknown effect id")
+
+        values = {}
         if state.name is not None:
             self.name = state.name
-            self._settings.set("name", self.name)
+            values["name"] = self.name
         if state.effect_id is not None:
-            if state.effect_id not in self._effects:
-                raise ValueError("unknown effect id")
             self.effect_id = state.effect_id
-            self._settings.set("effect_id", self.effect_id)
+            values["effect_id"] = self.effect_id
+        self._settings.update(values)
 
     def get_state(self) -> SectorState:
         return SectorState(
@@ -82,6 +99,17 @@ class Sector:
     def effect(self) -> Effect:
         return self._effects[self.effect_id]
 
+    def set_effects(self, effects: dict[str, Effect]) -> bool:
+        """Replaces effects (after reload), returns True if effect_id changed."""
+        self._effects = effects
+        if self.effect_id in effects:
+            return False
+        _LOGGER.warning(
+            "effect %s of sector %d removed, using default", self.effect_id, self.index
+        )
+        self.effect_id = list(effects.keys())[0]
+        return True
+
 
 class Wheel:
     def __init__(self, config, gpio):
@@ -89,6 +117,23 @@ class Wheel:
         self._loop = asyncio.get_running_loop()
         self._gpio = gpio
         self._subscriptions: list[Callable[[WheelStateUpdate], None]] = []
+        self._info_subscriptions: list[Callable[[WheelInfoUpdate], None]] = []
+        # Subsystems are opened in background, API is served meanwhile
+        self._ready: dict[str, bool] = {
+            name: False
+            for name in (
+                "settings",
+                "telemetry",
+                "encoder",
+                "wled",
+                "leds",
+                "servos",
+                "soundsystem",
+                "spin_store",
+            )
+        }
+        # Last error of subsystems (message, loop time)
+        self._errors: dict[str, tuple[str, float]] = {}
 
         self._poweroff_pin = "PL8"
         self._gpio.setup(
@@ -96,32 +141,56 @@ class Wheel:
         )
 
         settings_file = os.path.join(self._config.data_dir, "settings.json")
-        self._settings_mgr = SettingsManager(settings_file)
+        self._settings_mgr = SettingsManager(
+            settings_file,
+            debounce_secs=config.settings_debounce_secs,
+            max_delay_secs=config.settings_max_delay_secs,
+            journal=config.settings_journal,
+            journal_max_ops=config.settings_journal_max_ops,
+        )
         self._settings = self._settings_mgr["wheel"]
 
         self._telemetry = Telemetry(config)
+        self._loop_monitor = LoopMonitor(config, self._telemetry)
+        spin_store_file = config.spin_store_file
+        if spin_store_file is None:
+            spin_store_file = os.path.join(config.data_dir, "spins.db")
+        self._spin_store = SpinStore(config, spin_store_file)
         self._encoder = Encoder(
             config, self._gpio, self._telemetry, self._encoder_update
         )
+        self._wled = WledClient(config)
         self._leds = LedController(
-            config, self._settings_mgr["leds"], self._leds_update
+            config, self._wled, self._settings_mgr["leds"], self._leds_update
         )
-        self._servos = ServoController(config, self._servos_update)
+        self._servos = ServoController(config, self._wled, self._servos_update)
         self._soundsystem = SoundSystem(
-            config, self._settings_mgr["sound"], self._soundsystem_update
+            config,
+            self._settings_mgr["sound"],
+            self._telemetry,
+            self._soundsystem_update,
         )
 
         self._active_task: asyncio.Task | None = None
         self._cancelling_active_task: bool = False
         self._next_task: TaskType = TaskType.STARTUP
 
-        themes_file = os.path.join(config.data_dir, "themes.yaml")
-        self._themes = load_themes(themes_file)
+        self._themes_file = os.path.abspath(
+            os.path.join(config.data_dir, "themes.yaml")
+        )
+        content_cache_dir = config.content_cache_dir
+        if content_cache_dir is None:
+            content_cache_dir = os.path.join(config.data_dir, "cache", "content")
+        self._content_cache = ContentCache(content_cache_dir)
+        self._themes = load_themes(self._themes_file, self._content_cache)
         self._theme_id: str = list(self._themes.keys())[0]
         self._standby_timer: float = 600
 
-        effects_file = os.path.join(config.data_dir, "effects.yaml")
-        self._effects = load_effects(effects_file)
+        self._effects_file = os.path.abspath(
+            os.path.join(config.data_dir, "effects.yaml")
+        )
+        self._effects = load_effects(self._effects_file, self._content_cache)
+        self._sounds_dir = os.path.abspath(os.path.join(config.data_dir, "sounds"))
 
         self._sectors: list[Sector] = []
         for i in range(config.num_sectors):
@@ -132,15 +201,16 @@ class Wheel:
 
     async def init(self):
         _LOGGER.info("init")
+        self._loop_monitor.open()
 
         # Open settings
-        await self._settings_mgr.open()
+        await self._open_subsystem("settings", self._settings_mgr.open())
         if "theme_id" in self._settings:
             theme_id = self._settings["theme_id"]
             if theme_id in self._themes:
                 self._theme_id = theme_id
             else:
-                _LOGGER.warning("unknown theme id: %s" % (theme_id))
+                _LOGGER.warning("unknown theme id: %s", theme_id)
 
         if "standby_timer" in self._settings:
             self._standby_timer = self._settings["standby_timer"]
@@ -150,11 +220,11 @@ class Wheel:
 
         # Open connections
         await asyncio.gather(
-            self._telemetry.open(),
-            self._encoder.open(),
-            self._leds.open(),
-            self._servos.open(),
-            self._soundsystem.open(),
+            self._open_subsystem("telemetry", self._telemetry.open()),
+            self._open_subsystem("encoder", self._encoder.open()),
+            self._open_wled(),
+            self._open_subsystem("soundsystem", self._soundsystem.open()),
+            self._open_subsystem("spin_store", self._spin_store.open()),
         )
 
     async def close(self):
@@ -166,17 +236,62 @@ class Wheel:
             self._servos.close(),
             self._encoder.close(),
             self._soundsystem.close(),
+            self._spin_store.close(),
         )
+        await self._wled.close()
+        self._loop_monitor.close()
         if self._active_task is not None and not self._active_task.done():
             self._active_task.cancel()
 
+    async def _open_wled(self):
+        await self._open_subsystem("wled", self._wled.open())
+        await asyncio.gather(
+            self._open_subsystem("leds", self._leds.open()),
+            self._open_subsystem("servos", self._servos.open()),
+        )
+
+    async def _open_subsystem(self, name: str, coro):
+        try:
+            await coro
+        except Exception as e:
+            self._errors[name] = (repr(e), self._loop.time())
+            raise
+        self._ready[name] = True
+        startup_profile.mark("%s ready" % (name))
+        self._publish_update(WheelStateUpdate(ready=dict(self._ready)))
+        # Clients connected during startup got the info of these still empty
+        if name == "soundsystem":
+            self._publish_info_update(
+                WheelInfoUpdate(sounds=self._soundsystem.get_info().sounds)
+            )
+        elif name == "leds":
+            self._publish_info_update(WheelInfoUpdate(leds=self._leds.get_info()))
+        elif name == "servos":
+            self._publish_info_update(WheelInfoUpdate(servos=self._servos.get_info()))
+
+    def is_ready(self, name: str) -> bool:
+        return self._ready[name]
+
+    def check_ready(self, name: str):
+        """Raises RuntimeError if subsystem name is not opened yet."""
+        if not self._ready[name]:
+            raise RuntimeError("%s not ready" % (name))
+
     async def set_state(self, state: WheelStateIn):
+        # Check first, nothing is applied if a subsystem is not ready
+        if state.servos:
+            self.check_ready("servos")
+        if state.leds:
+            self.check_ready("leds")
+        if state.soundsystem:
+            self.check_ready("soundsystem")
+
         if state.active_task is not None:
-            _LOGGER.info("activate task: %s" % (state.active_task))
+            _LOGGER.info("activate task: %s", state.active_task)
             self._schedule_task(TaskType(state.active_task))
 
         if state.theme_id is not None:
-            _LOGGER.info("activate theme: %s" % (state.theme_id))
+            _LOGGER.info("activate theme: %s", state.theme_id)
             if state.theme_id in self._themes:
                 self._theme_id = state.theme_id
             else:
@@ -189,7 +304,7 @@ class Wheel:
             )
 
         if state.standby_timer is not None:
-            _LOGGER.info("set stadby timer: %s" % (state.standby_timer))
+            _LOGGER.info("set stadby timer: %s", state.standby_timer)
             self._standby_timer = state.standby_timer
             self._settings.set("standby_timer", self._standby_timer)
             self._publish_update(
@@ -230,6 +345,34 @@ class Wheel:
             servos=self._servos.get_state(),
             leds=self._leds.get_state(),
             soundsystem=self._soundsystem.get_state(),
+            ready=dict(self._ready),
+            fairness=self._spin_store.get_fairness(),
+        )
+
+    def get_health(self) -> HealthState:
+        """Readiness and last errors of subsystems (cheap, no I/O)."""
+        errors = dict(self._errors)
+        if self._wled.last_error is not None:
+            errors["wled"] = self._wled.last_error
+        if self._telemetry.last_error is not None:
+            errors["telemetry"] = self._telemetry.last_error
+
+        now = self._loop.time()
+        subsystems = {}
+        for name, ready in self._ready.items():
+            health = SubsystemHealth(ready=ready)
+            if name in errors:
+                health.last_error, error_time = errors[name]
+                health.last_error_age = now - error_time
+            subsystems[name] = health
+
+        latency = self._wled.latency
+        return HealthState(
+            ready=all(self._ready.values()),
+            uptime=startup_profile.uptime(),
+            subsystems=subsystems,
+            wled_connected=self._wled.ws_connected,
+            wled_latency_ms=1000 * latency if latency > 0 else None,
         )
 
     def get_info(self) -> WheelInfo:
@@ -248,20 +391,111 @@ class Wheel:
     def subscribe(self, callback: Callable[[WheelStateUpdate], None]):
         self._subscriptions.append(callback)
 
+    def subscribe_info(self, callback: Callable[[WheelInfoUpdate], None]):
+        self._info_subscriptions.append(callback)
+
     async def maintain(self):
         _LOGGER.info("maintain...")
         await gather_or_cancel(
             self._settings_mgr.maintain(),
             self._encoder.maintain(),
             self._telemetry.maintain(),
+            self._loop_monitor.maintain(),
+            self._wled.maintain(),
             self._leds.maintain(),
             self._servos.maintain(),
             self._soundsystem.maintain(),
+            self._spin_store.maintain(),
             self._maintain(),
             self._maintain_power_state(),
+            self._maintain_content(),
         )
         _LOGGER.info("maintain finished.")
 
+    async def _maintain_content(self):
+        if not self._config.content_reload:
+            return
+        _LOGGER.info("watching content changes: %s", self._config.data_dir)
+        async for changes in watchfiles.awatch(
+            self._config.data_dir, watch_filter=self._is_content_file
+        ):
+            try:
+                await self._reload_content({path for _, path in changes})
+            except Exception:
+                _LOGGER.exception("content reload failed")
+
+    def _is_content_file(self, change: watchfiles.Change, path: str) -> bool:
+        path = os.path.abspath(path)
+        return (
+            path in (self._themes_file, self._effects_file)
+            or os.path.dirname(path) == self._sounds_dir
+        )
+
+    async def _reload_content(self, paths: set[str]):
+        """Swaps in changed themes, effects and sounds (only changed entries)."""
+        update = WheelInfoUpdate()
+
+        if self._themes_file in paths:
+            themes = await self._load_content(load_themes, self._themes_file)
+            if themes is not None:
+                self._themes, update.themes, update.removed_themes = _swap_changed(
+                    self._themes, themes
+                )
+                if self._theme_id not in self._themes:
+                    _LOGGER.warning("theme %s removed, using default", self._theme_id)
+                    self._theme_id = list(self._themes.keys())[0]
+                    self._publish_update(WheelStateUpdate(theme_id=self._theme_id))
+
+        if self._effects_file in paths:
+            effects = await self._load_content(load_effects, self._effects_file)
+            if effects is not None:
+                self._effects, update.effects, update.removed_effects = _swap_changed(
+                    self._effects, effects
+                )
+                changed = [
+                    sector.set_effects(self._effects) for sector in self._sectors
+                ]
+                if any(changed):
+                    self._publish_update(
+                        WheelStateUpdate(
+                            sectors=[sector.get_state() for sector in self._sectors]
+                        )
+                    )
+
+        for name, sound_info in (await self._soundsystem.reload_sounds(paths)).items():
+            if sound_info is None:
+                update.removed_sounds.append(name)
+            else:
+                update.sounds[name] = sound_info
+
+        if update == WheelInfoUpdate():
+            return
+        _LOGGER.info(
+            "content reloaded, themes: %d/%d, effects: %d/%d, sounds: %d/%d "
+            "(changed/removed)",
+            len(update.themes),
+            len(update.removed_themes),
+            len(update.effects),
+            len(update.removed_effects),
+            len(update.sounds),
+            len(update.removed_sounds),
+        )
+        self._publish_info_update(update)
+
+    async def _load_content(self, loader, filename: str) -> dict | None:
+        # Parse and validate off the event loop, keep old content on errors
+        try:
+            content = await self._loop.run_in_executor(
+                None, functools.partial(loader, filename, self._content_cache)
+            )
+        except Exception:
+            _LOGGER.exception("invalid content, not reloaded: %s", filename)
+            return None
+        if len(content) == 0:
+            _LOGGER.error("no visible entries, not reloaded: %s", filename)
+            return None
+        return content
+
     async def _maintain_power_state(self):
         _LOGGER.info("start maintaining power state")
         while True:
@@ -287,7 +521,7 @@ class Wheel:
                 TaskType.STANDBY: self._task_standby,
                 TaskType.POWEROFF: self._task_poweroff,
             }[task]()
-            _LOGGER.info("start task: %s" % (task))
+            _LOGGER.info("start task: %s", task)
             active_task_name = task.value
             self._active_task = asyncio.create_task(task_co, name=active_task_name)
             self._publish_update(
@@ -310,9 +544,9 @@ class Wheel:
                     break
 
             if cancelled:
-                _LOGGER.info("task was cancelled: %s" % (self._cur_task))
+                _LOGGER.info("task was cancelled: %s", self._cur_task)
             else:
-                _LOGGER.info("task finished: %s" % (self._cur_task))
+                _LOGGER.info("task finished: %s", self._cur_task)
 
         _LOGGER.info("maintain loop finished")
 
@@ -324,7 +558,7 @@ class Wheel:
             _LOGGER.warning("Cannot schedule tasks after poweroff")
             return
 
-        _LOGGER.info("_schedule_task %s -> %s:" % (self._cur_task, task))
+        _LOGGER.info("_schedule_task %s -> %s:", self._cur_task, task)
         self._next_task = task
         if self._active_task is not None and not self._active_task.done():
             self._cancelling_active_task = True
@@ -343,6 +577,7 @@ class Wheel:
     async def _task_idle(self):
         cur_theme = None
         counter = 0
+        self._soundsystem.prefetch_sounds(MAIN_CH, self._theme.upcoming_sounds())
         while True:
             # Change theme if it has changed
             if cur_theme is None or cur_theme != self._theme:
@@ -379,25 +614,25 @@ class Wheel:
                 self._soundsystem.play(MAIN_CH, self._theme.next_theme_sound()),
             )
             while True:
+                self._prefetch_effect_sounds()
                 await asyncio.sleep(1.0)
         finally:
             end_state = self._encoder.get_state()
             duration = self._loop.time() - start_time
             total_sectors = end_state.total_sectors - start_state.total_sectors
             avg_rpm = total_sectors / self._config.num_sectors / duration * 60.0
-            end_sector_name = self._sectors[end_state.sector].name
+            end_sector = self._sectors[end_state.sector]
+            end_sector_name = end_sector.name
 
             _LOGGER.info(
-                "Spin ended: %d -> %d (%s), sectors: %d, duration %.1fs, avg_rpm: %.2f, standstill: %d"
-                % (
-                    start_state.sector,
-                    end_state.sector,
-                    end_sector_name,
-                    total_sectors,
-                    duration,
-                    avg_rpm,
-                    end_state.standstill,
-                )
+                "Spin ended: %d -> %d (%s), sectors: %d, duration %.1fs, avg_rpm: %.2f, standstill: %d",
+                start_state.sector,
+                end_state.sector,
+                end_sector_name,
+                total_sectors,
+                duration,
+                avg_rpm,
+                end_state.standstill,
             )
 
             point = (
@@ -412,41 +647,50 @@ class Wheel:
             )
             self._telemetry.report_point(point)
 
-    async def _task_stopped(self):
-        enc_state = self._encoder.get_state()
-        winning_sector = self._sectors[enc_state.sector]
-        effect = winning_sector.effect
-        _LOGGER.info("victory effect: %s" % (winning_sector.effect_id))
-
-        completed = False
-        try:
-            await self._servos.move_to_pos(1.0, motor_names=effect.active_servos)
-            await asyncio.sleep(2.0)
-
-            await self._soundsystem.volume_sweep(MAIN_CH, 1.0, 0.2, time_ms=1000)
-            await asyncio.sleep(0.2)
-
-            await asyncio.gather(
-                self._leds.set_state(LedsStateIn(segments=effect.leds_preset)),
-                self._soundsystem.play(EFFECT_CH, effect.effect_sound),
-                asyncio.sleep(4.0),
+            end_time = time.time()
+            self._spin_store.add(
+                SpinInfo(
+                    start_time=end_time - duration,
+                    end_time=end_time,
+                    start_sector=start_state.sector,
+                    end_sector=end_state.sector,
+                    end_sector_name=end_sector_name,
+                    total_sectors=total_sectors,
+                    duration=duration,
+                    avg_rpm=avg_rpm,
+                    theme_id=self._theme_id,
+                    effect_id=end_sector.effect_id,
+                )
+            )
+            self._publish_update(
+                WheelStateUpdate(fairness=self._spin_store.get_fairness())
             )
 
-            await self._soundsystem.volume_sweep(MAIN_CH, 0.2, 1.0, time_ms=1000)
-            await asyncio.sleep(4.0)
+    def _prefetch_effect_sounds(self):
+        # Wheel stops near the current sector, prefetch closest effects first
+        sector = self._encoder.get_state().sector
+        n = len(self._sectors)
+        sound_names = []
+        for offset in (0, 1, -1):
+            effect = self._sectors[(sector + offset) % n].effect
+            sound_names.append(effect.effect_sound)
+        # Keep likely winners decoded until the effect is played
+        self._soundsystem.pin_sounds(sound_names)
+        self._soundsystem.prefetch_sounds(EFFECT_CH, sound_names)
 
-            await self._servos.move_to_pos(0.0)
-            await asyncio.sleep(4.0)
-            await self._soundsystem.fadeout(MAIN_CH, fade_ms=2000)
-            completed = True
-            await asyncio.sleep(2.0)
-        finally:
-            if not completed:
-                _LOGGER.info("task was not completed, cleaning up")
-                await asyncio.gather(
-                    self._soundsystem.fadeout(MAIN_CH, fade_ms=2000),
-                    self._servos.move_to_pos(0.0),
-                )
+    async def _task_stopped(self):
+        enc_state = self._encoder.get_state()
+        winning_sector = self._sectors[enc_state.sector]
+        _LOGGER.info("victory effect: %s", winning_sector.effect_id)
+
+        timeline = Timeline(
+            winning_sector.effect,
+            self._servos,
+            self._leds,
+            self._soundsystem,
+            self._wled,
+        )
+        await timeline.run()
 
     async def _task_poweroff(self):
         await asyncio.gather(
@@ -481,8 +725,9 @@ class Wheel:
             # Ignore low speed spinning if wheel is playing effect
             # (Only high speed spinning will interrupt playing effect)
             _LOGGER.info(
-                "wheel moved slowly while playing effect: sector: %d, rmp: %.2f"
-                % (state.sector, state.rpm)
+                "wheel moved slowly while playing effect: sector: %d, rmp: %.2f",
+                state.sector,
+                state.rpm,
             )
         else:
             self._schedule_task(TaskType.SPINNING)
@@ -518,6 +763,10 @@ class Wheel:
         for callback in self._subscriptions:
             self._loop.call_soon(callback, update)
 
+    def _publish_info_update(self, update: WheelInfoUpdate):
+        for callback in self._info_subscriptions:
+            self._loop.call_soon(callback, update)
+
     @property
     def encoder(self):
         return self._encoder
@@ -534,6 +783,30 @@ class Wheel:
     def sound(self):
         return self._soundsystem
 
+    @property
+    def spins(self):
+        return self._spin_store
+
+    @property
+    def loop_monitor(self):
+        return self._loop_monitor
+
     @property
     def sectors(self):
         return self._sectors
+
+
+def _swap_changed(old: dict[str, BaseModel], new: dict[str, BaseModel]):
+    # Keeps unchanged objects (and their runtime state), returns the merged
+    # dict, changed entries and removed ids
+    merged = {}
+    changed = {}
+    for _id, item in new.items():
+        old_item = old.get(_id)
+        if old_item is not None and old_item.model_dump() == item.model_dump():
+            merged[_id] = old_item
+        else:
+            merged[_id] = item
+            changed[_id] = item.get_info()
+    removed = [_id for _id in old if _id not in new]
+    return merged, changed, removed
@@ -0,0 +1,241 @@
+import json
+import asyncio
+import aiohttp
+import logging
+from typing import Any
+from ._config import Config
+
+_LOGGER = logging.getLogger(__name__)
+
+__all__ = [
+    "WledClient",
+]
+
+# WLED handles only WebSocket messages that fit into a single frame
+WS_MAX_MESSAGE_LEN = 1450
+
+
+def merge_state(base: dict[str, Any], update: dict[str, Any]) -> dict[str, Any]:
+    # Recursive merge of WLED JSON state updates (later values win, lists replace)
+    for key, value in update.items():
+        if isinstance(value, dict) and isinstance(base.get(key), dict):
+            merge_state(base[key], value)
+        else:
+            base[key] = value
+    return base
+
+
+class WledClient:
+    """Shared connection to the WLED controller (used by LEDs and servos).
+
+    All requests go through a single small keep-alive connection pool. State
+    updates issued within the same event loop iteration are merged into one
+    update. Updates are pushed over the persistent `/ws` WebSocket when it is
+    connected and fall back to HTTP POST to `/json/state` otherwise.
+    """
+
+    def __init__(self, config):
+        self._config: Config = config
+        self._loop = asyncio.get_running_loop()
+        self._session: aiohttp.ClientSession | None = None
+        self._info: dict[str, Any] = {}
+        self._device_state: dict[str, Any] = {}
+        self._ws: aiohttp.ClientWebSocketResponse | None = None
+
+        self._pending_state: dict[str, Any] | None = None
+        self._pending_future: asyncio.Future | None = None
+        self._flush_tasks = set()
+
+        # Smoothed round-trip time of HTTP requests [s], WS messages can not
+        # be matched to replies as WLED also broadcasts state changes
+        self._rtt: float = 0.0
+        # Last failed request or connection (message, loop time)
+        self.last_error: tuple[str, float] | None = None
+
+    async def open(self):
+        _LOGGER.info("open (%s)", self._config.wled_url)
+        connector = aiohttp.TCPConnector(
+            limit=self._config.wled_max_connections,
+            keepalive_timeout=self._config.wled_keepalive_secs,
+            use_dns_cache=True,
+            ttl_dns_cache=300,
+        )
+        self._session = aiohttp.ClientSession(
+            base_url=self._config.wled_url,  # type: ignore
+            connector=connector,
+            timeout=aiohttp.ClientTimeout(total=self._config.wled_timeout_secs),
+            raise_for_status=True,  # type: ignore
+        )
+        self._info = await self.get_json("/json/info")
+        _LOGGER.debug("info: %s", self._info)
+
+    async def close(self):
+        if self._session is None:
+            return
+        _LOGGER.info("close")
+        if self._ws is not None:
+            await self._ws.close()
+        # Let in-flight state updates finish before closing the connection
+        await asyncio.sleep(0)
+        await asyncio.gather(*self._flush_tasks, return_exceptions=True)
+        await self._session.close()
+        self._session = None
+        _LOGGER.info("close done.")
+
+    async def get_json(self, path: str) -> Any:
+        async def request(session: aiohttp.ClientSession):
+            async with session.get(path) as resp:
+                return await resp.json()
+
+        return await self._request(request)
+
+    async def post_json(self, path: str, data: Any) -> Any:
+        async def request(session: aiohttp.ClientSession):
+            async with session.post(path, json=data) as resp:
+                return await resp.json()
+
+        return await self._request(request)
+
+    async def update_state(self, state: dict[str, Any]):
+        """Post state to WLED, coalescing updates made in the same loop tick."""
+        if self._session is None:
+            raise ConnectionError("Session is not opened.")
+
+        if self._pending_state is None:
+            self._pending_state = {}
+            self._pending_future = self._loop.create_future()
+            self._loop.call_soon(self._flush_state)
+        merge_state(self._pending_state, state)
+
+        future = self._pending_future
+        await asyncio.shield(future)  # type: ignore
+
+    def get_info(self) -> dict[str, Any]:
+        return self._info
+
+    def get_device_state(self) -> dict[str, Any]:
+        # Last state reported by the device over WebSocket
+        return self._device_state
+
+    @property
+    def latency(self) -> float:
+        # Estimated one-way latency to the device [s]
+        return 0.5 * self._rtt
+
+    @property
+    def ws_connected(self) -> bool:
+        return self._ws is not None and not self._ws.closed
+
+    async def maintain(self):
+        if self._config.wled_transport != "ws":
+            return
+
+        backoff = self._config.wled_reconnect_secs
+        while True:
+            try:
+                await self._maintain_ws()
+                backoff = self._config.wled_reconnect_secs
+            except (
+                aiohttp.ClientError,
+                asyncio.TimeoutError,
+                ValueError,
+                OSError,
+            ) as e:
+                # OSError includes ConnectionError of a session not opened
+                _LOGGER.warning("WS connection failed: %r", e)
+                self._set_error(e)
+                backoff = min(2 * backoff, 30.0)
+            _LOGGER.info("WS reconnect in %.1f s", backoff)
+            await asyncio.sleep(backoff)
+
+    async def _maintain_ws(self):
+        if self._session is None:
+            raise ConnectionError("Session is not opened.")
+
+        _LOGGER.info("WS connect")
+        async with self._session.ws_connect(
+            "/ws",
+            heartbeat=self._config.wled_keepalive_secs,
+            timeout=self._config.wled_timeout_secs,
+        ) as ws:
+            self._ws = ws
+            _LOGGER.info("WS connected")
+            try:
+                async for msg in ws:
+                    if msg.type == aiohttp.WSMsgType.TEXT:
+                        self._ws_message_received(msg.json())
+                    elif msg.type == aiohttp.WSMsgType.ERROR:
+                        _LOGGER.warning("WS error: %s", ws.exception())
+                        break
+            finally:
+                self._ws = None
+        _LOGGER.info("WS disconnected")
+
+    def _ws_message_received(self, data: dict[str, Any]):
+        if "state" in data:
+            self._device_state = data["state"]
+        if "info" in data:
+            self._info = data["info"]
+
+    def _flush_state(self):
+        state, future = self._pending_state, self._pending_future
+        self._pending_state, self._pending_future = None, None
+
+        async def flush():
+            try:
+                await self._send_state(state)  # type: ignore
+            except Exception as e:
+                future.set_exception(e)  # type: ignore
+            else:
+                future.set_result(None)  # type: ignore
+
+        task = asyncio.create_task(flush())
+        self._flush_tasks.add(task)
+        task.add_done_callback(self._flush_tasks.discard)
+
+    async def _send_state(self, state: dict[str, Any]):
+        if self._ws is not None and not self._ws.closed:
+            data = json.dumps(state, separators=(",", ":"))
+            if len(data) <= WS_MAX_MESSAGE_LEN:
+                try:
+                    await self._ws.send_str(data)
+                    return
+                except (ConnectionError, RuntimeError) as e:
+                    _LOGGER.warning("WS send failed, fallback to HTTP: %r", e)
+        await self.post_json("/json/state", state)
+
+    def _set_error(self, e: BaseException):
+        self.last_error = (repr(e), self._loop.time())
+
+    def _update_rtt(self, rtt: float):
+        if self._rtt <= 0.0:
+            self._rtt = rtt
+        else:
+            self._rtt += 0.2 * (rtt - self._rtt)
+
+    async def _request(self, request):
+        if self._session is None:
+            raise ConnectionError("Session is not opened.")
+
+        retries = self._config.wled_retries
+        for attempt in range(retries + 1):
+            try:
+                start_time = self._loop.time()
+                res = await request(self._session)
+                self._update_rtt(self._loop.time() - start_time)
+                return res
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                self._set_error(e)
+                if isinstance(e, aiohttp.ClientResponseError) and e.status < 500:
+                    raise
+                if attempt >= retries:
+                    raise
+                backoff = self._config.wled_retry_backoff_secs * 2**attempt
+                _LOGGER.warning(
+                    "request failed (%r), retry in %.2f s (%d/%d)",
+                    e,
+                    backoff,
+                    attempt + 1,
+                    retries,
+                )
+                await asyncio.sleep(backoff)
@@ -6,7 +6,9 @@ from fastapi import WebSocket, WebSocketDisconnect
 from .schemas import (
     WsCommandType,
     WsInitPacket,
+    WheelInfoUpdate,
     WheelStateUpdate,
+    WsInfoUpdatePacket,
     WsUpdatePacket,
     WsSetStatePacket,
 )
@@ -24,7 +26,7 @@ class WsConnection:
         self._websocket: WebSocket = websocket
 
     async def connect(self):
-        _LOGGER.info("Accept WS connection %s" % (str(self._websocket.client)))
+        _LOGGER.info("Accept WS connection %s", str(self._websocket.client))
         await self._websocket.accept()
         await self._send_init()
 
@@ -35,7 +37,11 @@ class WsConnection:
                 cmd = WsCommandType(packet_json.get("cmd"))
                 if cmd == WsCommandType.SET_STATE:
                     packet = WsSetStatePacket.model_validate(packet_json)
-                    await self._mgr._wheel.set_state(packet.state)
+                    try:
+                        await self._mgr._wheel.set_state(packet.state)
+                    except RuntimeError as e:
+                        # Subsystem not ready yet, client may retry
+                        _LOGGER.warning("set state rejected: %s", e)
                 else:
                     raise ValueError("Unknown packet: %s" % (packet_json))
         except WebSocketDisconnect:
@@ -45,9 +51,7 @@ class WsConnection:
         try:
             await self._websocket.send_text(data)
         except Exception:
-            _LOGGER.exception(
-                "Unable to send WS data: %s" % (str(self._websocket.client))
-            )
+            _LOGGER.exception("Unable to send WS data: %s", self._websocket.client)
             self._mgr._disconnect(self)
 
     async def _send_init(self):
@@ -65,12 +69,14 @@ class WsManager:
         self._wheel: Wheel = wheel
         self._connections: set[WsConnection] = set()
         self._wheel.subscribe(self._wheel_update_received)
+        self._wheel.subscribe_info(self._wheel_info_update_received)
         self._background_tasks = set()
 
     async def add_client(self, websocket: WebSocket) -> WsConnection | None:
         _LOGGER.info(
-            "WsManager: add client %s (num_connections: %d)"
-            % (websocket.client, len(self._connections) + 1)
+            "WsManager: add client %s (num_connections: %d)",
+            websocket.client,
+            len(self._connections) + 1,
         )
 
         try:
@@ -78,9 +84,7 @@ class WsManager:
             await connection.connect()
             self._connections.add(connection)
         except Exception:
-            _LOGGER.exception(
-                "Failed to connect to WS client: %s" % (str(websocket.client))
-            )
+            _LOGGER.exception("Failed to connect to WS client: %s", websocket.client)
             connection = None
         return connection
 
@@ -91,6 +95,13 @@ class WsManager:
         )
         await self._broadcast(packet.model_dump_json(exclude_none=True))
 
+    async def _broadcast_info_update(self, update: WheelInfoUpdate):
+        packet = WsInfoUpdatePacket(
+            ts=time.time(),
+            update=update,
+        )
+        await self._broadcast(packet.model_dump_json(exclude_none=True))
+
     async def _broadcast(self, data: str):
         r = []
         for connection in self._connections:
@@ -101,8 +112,9 @@ class WsManager:
         if connection not in self._connections:
             return
         _LOGGER.info(
-            "WsManager: disconnected %s (num_connections: %d)"
-            % (str(connection._websocket.client), len(self._connections) - 1)
+            "WsManager: disconnected %s (num_connections: %d)",
+            str(connection._websocket.client),
+            len(self._connections) - 1,
         )
         self._connections.remove(connection)
 
@@ -110,3 +122,8 @@ class WsManager:
         task = asyncio.create_task(self._broadcast_update(update))
         self._background_tasks.add(task)
         task.add_done_callback(self._background_tasks.discard)
+
+    def _wheel_info_update_received(self, update: WheelInfoUpdate):
+        task = asyncio.create_task(self._broadcast_info_update(update))
+        self._background_tasks.add(task)
+        task.add_done_callback(self._background_tasks.discard)
@@ -2,7 +2,9 @@ import sys
 import asyncio
 import logging
 import OPi.GPIO as GPIO
+from fastapi import HTTPException
 from ._config import Config
+from ._startup import startup_profile
 from ._wheel import Wheel
 from ._ws_manager import WsManager
 
@@ -16,7 +18,23 @@ maintain_wheel_task = None
 
 async def get_wheel() -> Wheel:
     if wheel is None:
-        raise ValueError()
+        raise HTTPException(status_code=503, detail="Wheel is not started")
+    return wheel
+
+
+def get_ready_wheel(name: str):
+    """Dependency on the wheel with subsystem name opened, 503 before."""
+
+    async def dependency() -> Wheel:
+        wheel = await get_wheel()
+        if not wheel.is_ready(name):
+            raise HTTPException(status_code=503, detail="%s not ready" % (name))
+        return wheel
+
+    return dependency
+
+
+async def get_optional_wheel() -> Wheel | None:
     return wheel
 
 
@@ -34,6 +52,8 @@ async def startup_event():
         _LOGGER.info("maintain_wheel...")
         try:
             await wheel.init()
+            startup_profile.mark("wheel ready")
+            startup_profile.report()
             await wheel.maintain()
         except Exception:
             _LOGGER.exception("Unrecoverable error in maintain_wheel")
@@ -47,6 +67,7 @@ async def startup_event():
     global ws_manager
     if wheel is None:
         config = Config()
+        startup_profile.enabled = config.startup_profile
 
         gpio = GPIO
         gpio.setwarnings(False)
@@ -54,6 +75,7 @@ async def startup_event():
 
         wheel = Wheel(config, gpio)
         ws_manager = WsManager(wheel)
+        startup_profile.mark("wheel created")
         maintain_wheel_task = asyncio.create_task(maintain_wheel())
 
 
@@ -20,6 +20,7 @@ import ThemeSelect from './components/ThemeSelect';
 import {
   WsInitPacket,
   WsUpdatePacket,
+  WsInfoUpdatePacket,
   WsSetStatePacket,
   SectorState,
   EncoderState,
@@ -28,8 +29,35 @@ import {
   WheelStateIn,
   ServosState,
   WheelInfo,
+  WheelInfoUpdate,
 } from './schemas';
 
+function mergeEntries<T>(
+  entries: Record<string, T>,
+  changed: Record<string, T>,
+  removed: Array<string>,
+): Record<string, T> {
+  const merged = { ...entries, ...changed };
+  for (const id of removed) {
+    delete merged[id];
+  }
+  return merged;
+}
+
+function applyInfoUpdate(info: WheelInfo, update: WheelInfoUpdate): WheelInfo {
+  return {
+    ...info,
+    themes: mergeEntries(info.themes, update.themes, update.removed_themes),
+    effects: mergeEntries(info.effects, update.effects, update.removed_effects),
+    soundsystem: {
+      ...info.soundsystem,
+      sounds: mergeEntries(info.soundsystem.sounds, update.sounds, update.removed_sounds),
+    },
+    servos: update.servos ?? info.servos,
+    leds: update.leds ?? info.leds,
+  };
+}
+
 const WS_URL =
   import.meta.env.VITE_WS_URL ??
   (window.location.protocol === 'http:' ? 'ws://' : 'wss://') + window.location.host + '/api/v1/ws';
@@ -151,6 +179,9 @@ export default function App() {
         if (update.servos !== undefined) setServosState(update.servos);
         if (update.leds !== undefined) setLedsState(update.leds);
         if (update.soundsystem !== undefined) setSoundsystemState(update.soundsystem);
+      } else if (message.cmd === 'info_update') {
+        const packet = WsInfoUpdatePacket.parse(message);
+        setInfo((info) => applyInfoUpdate(info, packet.update));
       }
     };
 
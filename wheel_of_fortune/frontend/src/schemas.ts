@@ -230,6 +230,20 @@ export const WheelInfo = z.object({
 });
 export type WheelInfo = z.infer<typeof WheelInfo>;
 
+export const WheelInfoUpdate = z.object({
+  // Content reloaded from data_dir (added or changed entries, removed ids)
+  themes: z.record(z.string(), ThemeInfo).default({}),
+  removed_themes: z.array(z.string()).default([]),
+  effects: z.record(z.string(), EffectInfo).default({}),
+  removed_effects: z.array(z.string()).default([]),
+  sounds: z.record(z.string(), SoundInfo).default({}),
+  removed_sounds: z.array(z.string()).default([]),
+  // Info only known after the subsystem is opened
+  servos: ServosInfo.optional(),
+  leds: LedsInfo.optional(),
+});
+export type WheelInfoUpdate = z.infer<typeof WheelInfoUpdate>;
+
 // ----------------------------------------------------------------------------
 // Websocket
 // ----------------------------------------------------------------------------
@@ -249,6 +263,13 @@ export const WsUpdatePacket = z.object({
 });
 export type WsUpdatePacket = z.infer<typeof WsUpdatePacket>;
 
+export const WsInfoUpdatePacket = z.object({
+  cmd: z.string(),
+  ts: z.number(),
+  update: WheelInfoUpdate,
+});
+export type WsInfoUpdatePacket = z.infer<typeof WsInfoUpdatePacket>;
+
 export const WsSetStatePacket = z.object({
   cmd: z.string(),
   ts: z.number(),
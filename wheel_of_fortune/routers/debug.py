@@ -0,0 +1,31 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import PlainTextResponse
+from ..dependencies import get_wheel
+from ..schemas import LoopStatsState
+
+router = APIRouter(tags=["debug"])
+
+
+@router.get("/api/v1/debug/loop")
+async def get_loop_stats(wheel=Depends(get_wheel)) -> LoopStatsState:
+    return wheel.loop_monitor.get_stats()
+
+
+@router.get("/api/v1/debug/profile", response_class=PlainTextResponse)
+async def get_profile(
+    duration: float = Query(default=5.0, gt=0.0),
+    interval: float = Query(default=0.005, ge=0.001),
+    wheel=Depends(get_wheel),
+):
+    """Samples the event loop thread, returns folded stacks for flame graphs.
+
+    The output can be loaded into speedscope or rendered with flamegraph.pl.
+    """
+    try:
+        counts = await wheel.loop_monitor.profile(duration, interval)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    lines = ["%s %d" % (stack, count) for stack, count in counts.most_common()]
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,29 @@
+from fastapi import APIRouter, Depends, Response
+from ..dependencies import get_optional_wheel
+from .._startup import startup_profile
+from ..schemas import HealthState
+
+router = APIRouter(tags=["health"])
+
+
+def _health(wheel) -> HealthState:
+    if wheel is None:
+        return HealthState(ready=False, uptime=startup_profile.uptime())
+    return wheel.get_health()
+
+
+@router.get("/api/v1/health")
+async def get_health(wheel=Depends(get_optional_wheel)) -> HealthState:
+    # Liveness, served as soon as the API is up
+    return _health(wheel)
+
+
+@router.get("/api/v1/ready")
+async def get_ready(
+    response: Response, wheel=Depends(get_optional_wheel)
+) -> HealthState:
+    # 503 until all subsystems are initialized
+    health = _health(wheel)
+    if not health.ready:
+        response.status_code = 503
+    return health
@@ -1,5 +1,5 @@
 from fastapi import APIRouter, Depends
-from ..dependencies import get_wheel
+from ..dependencies import get_ready_wheel, get_wheel
 from ..schemas import LedsState, LedsInfo, LedsStateIn
 
 router = APIRouter(tags=["leds"])
@@ -16,5 +16,5 @@ async def get_info(wheel=Depends(get_wheel)) -> LedsInfo:
 
 
 @router.patch("/api/v1/leds/state")
-async def set_state(state: LedsStateIn, wheel=Depends(get_wheel)):
+async def set_state(state: LedsStateIn, wheel=Depends(get_ready_wheel("leds"))):
     await wheel.leds.set_state(state)
@@ -1,5 +1,5 @@
 from fastapi import APIRouter, Depends
-from ..dependencies import get_wheel
+from ..dependencies import get_ready_wheel, get_wheel
 from ..schemas import ServosState, ServosInfo, ServosStateIn
 
 router = APIRouter(tags=["servos"])
@@ -16,5 +16,5 @@ async def get_info(wheel=Depends(get_wheel)) -> ServosInfo:
 
 
 @router.patch("/api/v1/servos/state")
-async def set_state(state: ServosStateIn, wheel=Depends(get_wheel)):
+async def set_state(state: ServosStateIn, wheel=Depends(get_ready_wheel("servos"))):
     await wheel.servos.set_state(state)
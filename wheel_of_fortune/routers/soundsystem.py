@@ -1,5 +1,5 @@
 from fastapi import APIRouter, Depends
-from ..dependencies import get_wheel
+from ..dependencies import get_ready_wheel, get_wheel
 from ..schemas import SoundSystemState, SoundSystemInfo, SoundSystemStateIn
 
 router = APIRouter(tags=["soundsystem"])
@@ -16,5 +16,7 @@ async def get_info(wheel=Depends(get_wheel)) -> SoundSystemInfo:
 
 
 @router.patch("/api/v1/soundsystem/state")
-async def set_state(state: SoundSystemStateIn, wheel=Depends(get_wheel)):
+async def set_state(
+    state: SoundSystemStateIn, wheel=Depends(get_ready_wheel("soundsystem"))
+):
     await wheel.sound.set_state(state)
@@ -0,0 +1,34 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from ..dependencies import get_wheel
+from ..schemas import FairnessState, SpinPage, SpinStats
+
+router = APIRouter(tags=["spins"])
+
+
+@router.get("/api/v1/spins")
+async def get_spins(
+    limit: int = Query(default=50, ge=1, le=1000),
+    before_id: int | None = None,
+    wheel=Depends(get_wheel),
+) -> SpinPage:
+    try:
+        return await wheel.spins.get_spins(limit, before_id)
+    except RuntimeError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+
+
+@router.get("/api/v1/spins/stats")
+async def get_spin_stats(
+    since: float | None = None,
+    until: float | None = None,
+    wheel=Depends(get_wheel),
+) -> SpinStats:
+    try:
+        return await wheel.spins.get_stats(since, until)
+    except RuntimeError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+
+
+@router.get("/api/v1/spins/fairness")
+async def get_fairness(wheel=Depends(get_wheel)) -> FairnessState:
+    return wheel.spins.get_fairness()
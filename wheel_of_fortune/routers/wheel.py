@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException
 from ..dependencies import get_wheel
 from ..schemas import WheelState, WheelInfo, WheelStateIn
 
@@ -17,4 +17,7 @@ async def get_info(wheel=Depends(get_wheel)) -> WheelInfo:
 
 @router.patch("/api/v1/wheel/state")
 async def set_state(state: WheelStateIn, wheel=Depends(get_wheel)):
-    await wheel.set_state(state)
+    try:
+        await wheel.set_state(state)
+    except RuntimeError as e:
+        raise HTTPException(status_code=503, detail=str(e))
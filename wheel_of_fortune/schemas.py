@@ -1,5 +1,6 @@
 from enum import Enum
-from pydantic import BaseModel, Field
+from typing import Literal
+from pydantic import BaseModel, Field, model_validator
 
 
 # -----------------------------------------------------------------------------
@@ -109,6 +110,7 @@ class LedsInfo(BaseModel):
 class SoundChannelState(BaseModel):
     volume: float
     sound_name: str | None
+    voices: int = 0  # Currently playing voices
 
 
 class SoundChannelStateIn(BaseModel):
@@ -116,8 +118,23 @@ class SoundChannelStateIn(BaseModel):
     sound_name: str | None = None
 
 
+class SoundStatsState(BaseModel):
+    # Statistics of the last reporting period
+    plays: int
+    play_latency_avg_ms: float | None  # SoundSystem.play() to Channel.play()
+    play_latency_max_ms: float | None
+    busy_voices_avg: float | None
+    busy_voices_max: int
+    stalls: int  # Mixer fell behind wall clock (buffer underruns)
+    stall_max_ms: float
+    output_latency_ms: float  # Mixer buffer duration
+
+
 class SoundSystemState(BaseModel):
     channels: dict[str, SoundChannelState]
+    voices_used: int = 0
+    voices_total: int = 0
+    stats: SoundStatsState | None = None
 
 
 class SoundSystemStateIn(BaseModel):
@@ -173,6 +190,41 @@ class ThemeInfo(BaseModel):
 # -----------------------------------------------------------------------------
 
 
+class TimelineAction(Enum):
+    SERVOS = "servos"  # Move servos (pos, motors)
+    LEDS = "leds"  # Apply LED preset (leds_preset, transition_ms)
+    SOUND_PLAY = "sound_play"  # Play sound (channel, sound)
+    SOUND_FADEOUT = "sound_fadeout"  # Fade out channel (channel, time_ms)
+    VOLUME_SWEEP = "volume_sweep"  # (channel, volume_from, volume_to, time_ms, curve)
+
+
+class VolumeCurve(Enum):
+    LINEAR = "linear"
+    EXPONENTIAL = "exponential"  # Linear in dB
+
+
+class KeyframeInfo(BaseModel):
+    at: float = Field(ge=0.0)  # Offset from the start of the effect [s]
+    action: TimelineAction
+    pos: float | None = Field(default=None, ge=-0.3, le=1.3)  # Required by servos
+    # Defaults to effect active_servos, "all" for every servo
+    motors: list[str] | Literal["all"] | None = None
+    leds_preset: dict[str, LedSegmentStateIn] | None = None  # Defaults to effect's
+    transition_ms: float = 0.0
+    channel: str = "main"
+    sound: str | None = None  # Defaults to effect_sound
+    volume_from: float = Field(default=1.0, ge=0.0, le=1.0)
+    volume_to: float = Field(default=1.0, ge=0.0, le=1.0)
+    time_ms: int = Field(default=300, ge=0)
+    curve: VolumeCurve = VolumeCurve.LINEAR
+
+    @model_validator(mode="after")
+    def check_action_fields(self) -> "KeyframeInfo":
+        if self.action == TimelineAction.SERVOS and self.pos is None:
+            raise ValueError("servos keyframe requires pos")
+        return self
+
+
 class EffectInfo(BaseModel):
     name: str
     description: str
@@ -182,6 +234,23 @@ class EffectInfo(BaseModel):
     effect_sound: str
     leds_preset: dict[str, LedSegmentStateIn]
     active_servos: list[str]
+    timeline: list[KeyframeInfo] = []
+
+
+# -----------------------------------------------------------------------------
+# Fairness
+# -----------------------------------------------------------------------------
+
+
+class FairnessState(BaseModel):
+    spins: int
+    sector_counts: list[int]  # Wins per sector
+    chi_square: float | None = None  # Against a fair wheel
+    p_value: float | None = None  # Probability of chi_square on a fair wheel
+    transitions: list[list[int]]  # Spins by [start_sector][end_sector]
+    total_sectors: dict[int, int]  # Spins by sectors passed
+    total_sectors_mean: float | None = None
+    total_sectors_std: float | None = None
 
 
 # -----------------------------------------------------------------------------
@@ -198,6 +267,8 @@ class WheelState(BaseModel):
     servos: ServosState
     leds: LedsState
     soundsystem: SoundSystemState
+    ready: dict[str, bool] = {}  # Subsystems done initializing
+    fairness: FairnessState
 
 
 class WheelStateIn(BaseModel):
@@ -219,6 +290,8 @@ class WheelStateUpdate(BaseModel):
     servos: ServosState | None = None
     leds: LedsState | None = None
     soundsystem: SoundSystemState | None = None
+    ready: dict[str, bool] | None = None
+    fairness: FairnessState | None = None
 
 
 class WheelInfo(BaseModel):
@@ -233,6 +306,95 @@ class WheelInfo(BaseModel):
     soundsystem: SoundSystemInfo
 
 
+class WheelInfoUpdate(BaseModel):
+    # Content reloaded from data_dir (added or changed entries, removed ids)
+    themes: dict[str, ThemeInfo] = {}
+    removed_themes: list[str] = []
+    effects: dict[str, EffectInfo] = {}
+    removed_effects: list[str] = []
+    sounds: dict[str, SoundInfo] = {}
+    removed_sounds: list[str] = []
+    # Info only known after the subsystem is opened
+    servos: ServosInfo | None = None
+    leds: LedsInfo | None = None
+
+
+# -----------------------------------------------------------------------------
+# Spins
+# -----------------------------------------------------------------------------
+
+
+class SpinInfo(BaseModel):
+    id: int | None = None  # Assigned when stored
+    start_time: float  # Unix time
+    end_time: float
+    start_sector: int
+    end_sector: int
+    end_sector_name: str
+    total_sectors: int
+    duration: float
+    avg_rpm: float
+    theme_id: str
+    effect_id: str
+
+
+class SpinPage(BaseModel):
+    spins: list[SpinInfo]  # Newest first
+    next_before_id: int | None = None  # Cursor of next (older) page
+
+
+class RpmHistogramBin(BaseModel):
+    rpm_min: float
+    rpm_max: float
+    count: int
+
+
+class SpinStats(BaseModel):
+    spins: int
+    sector_wins: list[int]
+    chi_square: float | None = None  # Against a fair wheel
+    p_value: float | None = None  # Probability of chi_square on a fair wheel
+    duration_avg: float | None = None
+    avg_rpm_avg: float | None = None
+    rpm_histogram: list[RpmHistogramBin] = []
+
+
+# -----------------------------------------------------------------------------
+# Health
+# -----------------------------------------------------------------------------
+
+
+class SubsystemHealth(BaseModel):
+    ready: bool
+    last_error: str | None = None
+    last_error_age: float | None = None  # Seconds since last error
+
+
+class HealthState(BaseModel):
+    ready: bool  # All subsystems ready
+    uptime: float
+    subsystems: dict[str, SubsystemHealth] = {}
+    wled_connected: bool = False  # WebSocket connection
+    wled_latency_ms: float | None = None
+
+
+# -----------------------------------------------------------------------------
+# Debug
+# -----------------------------------------------------------------------------
+
+
+class SlowCallbackInfo(BaseModel):
+    name: str  # Task name and coroutine, or callback
+    duration_ms: float
+
+
+class LoopStatsState(BaseModel):
+    lag_avg_ms: float | None = None
+    lag_max_ms: float = 0.0
+    slow_callbacks: int = 0
+    slowest: list[SlowCallbackInfo] = []
+
+
 # -----------------------------------------------------------------------------
 # Websocket
 # -----------------------------------------------------------------------------
@@ -242,6 +404,7 @@ class WsCommandType(Enum):
     INIT = "init"  # Full state and info (to client)
     UPDATE = "update"  # State update (to client)
     SET_STATE = "set_state"  # Set state (to server)
+    INFO_UPDATE = "info_update"  # Info update (to client)
 
 
 class WsInitPacket(BaseModel):
@@ -257,6 +420,12 @@ class WsUpdatePacket(BaseModel):
     update: WheelStateUpdate
 
 
+class WsInfoUpdatePacket(BaseModel):
+    cmd: WsCommandType = WsCommandType.INFO_UPDATE
+    ts: float
+    update: WheelInfoUpdate
+
+
 class WsSetStatePacket(BaseModel):
     cmd: WsCommandType = WsCommandType.SET_STATE
     ts: float